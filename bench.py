@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+"""Quokka - Performance benchmarks.
+
+Each benchmark runs against a throwaway database seeded with synthetic
+entries, so it never touches the real quokka.db.
+
+    python bench.py serve [--seconds 3] [--clients 1,2,4,8,16]
+    python bench.py connections [--iterations 500]
+    python bench.py mutations [--iterations 50]
+    python bench.py suggest [--entries 100000] [--iterations 50]
+    python bench.py writes [--seconds 3] [--clients 1,2,4,8,16]
+    python bench.py startup [--entries 100000] [--iterations 5]
+    python bench.py plans [--days 3650]
+"""
+
+import argparse
+import datetime
+import http.client
+import os
+import random
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+import db
+
+
+# --- Synthetic data ---
+
+def seed_db(db_path, days=365, per_day=6, accounts=20, seed=1):
+    """Create a database with `days` days of history, `per_day` entries each."""
+    rng = random.Random(seed)
+    db.init_db(db_path)
+    with db.get_connection(db_path, write=True) as conn:
+        db._touch(conn, "accounts")
+        account_ids = []
+        for i in range(accounts):
+            cur = conn.execute(
+                "INSERT INTO imputation_accounts (number, description, project) VALUES (?, ?, ?)",
+                (f"A{i:04d}", f"Account {i}", f"Project {i % 5}"),
+            )
+            account_ids.append(cur.lastrowid)
+        link_type_ids = [r["id"] for r in conn.execute("SELECT id FROM ado_link_types").fetchall()]
+        words = ["review", "meeting", "build", "deploy", "fix", "design", "support", "planning",
+                 "sync", "release", "triage", "docs", "refactor", "oncall", "interview"]
+        start = datetime.date.today() - datetime.timedelta(days=days - 1)
+        for d in range(days):
+            day = (start + datetime.timedelta(days=d)).isoformat()
+            for pos in range(per_day):
+                desc = " ".join(rng.sample(words, 2)) + f" #{rng.randint(1, 400)}"
+                cur = conn.execute(
+                    "INSERT INTO entries (date, duration, description, notes, sort_order) VALUES (?, ?, ?, ?, ?)",
+                    (day, rng.choice([15, 30, 45, 60, 90, 120]), desc, "", pos),
+                )
+                entry_id = cur.lastrowid
+                for i, account_id in enumerate(rng.sample(account_ids, rng.randint(1, 2))):
+                    conn.execute(
+                        "INSERT INTO entry_imputations (entry_id, account_id, duration, position) VALUES (?, ?, ?, ?)",
+                        (entry_id, account_id, 30, i),
+                    )
+                conn.execute(
+                    "INSERT INTO entry_ado_items (entry_id, link_type_id, value, position) VALUES (?, ?, ?, ?)",
+                    (entry_id, rng.choice(link_type_ids), str(rng.randint(1000, 9999)), 0),
+                )
+        conn.commit()
+    db.check_rollups(db_path, repair=True)
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[idx]
+
+
+def _timeit(fn, iterations):
+    """Call fn `iterations` times; return (mean, p99) latency in seconds."""
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return sum(samples) / len(samples), _percentile(samples, 99)
+
+
+def _count_statements(db_path, fn):
+    """Run fn and return (result, number of SQL statements it executed).
+
+    Relies on the pool handing the same idle connection back to the next
+    caller on this thread.
+    """
+    statements = []
+    with db.get_connection(db_path) as conn:
+        conn.set_trace_callback(statements.append)
+    try:
+        result = fn()
+    finally:
+        with db.get_connection(db_path) as conn:
+            conn.set_trace_callback(None)
+    return result, len(statements)
+
+
+def _add_day(db_path, day, count, group_id=None):
+    """Insert `count` entries with one split and one ADO item each on `day`."""
+    with db.get_connection(db_path, write=True) as conn:
+        account_id = conn.execute("SELECT MIN(id) FROM imputation_accounts").fetchone()[0]
+        ids = []
+        for pos in range(count):
+            cur = conn.execute(
+                "INSERT INTO entries (date, duration, description, sort_order, group_id) VALUES (?, 30, ?, ?, ?)",
+                (day, f"bulk {pos}", pos, group_id),
+            )
+            ids.append(cur.lastrowid)
+            conn.execute(
+                "INSERT INTO entry_imputations (entry_id, account_id, duration, position) VALUES (?, ?, 30, 0)",
+                (cur.lastrowid, account_id),
+            )
+            conn.execute(
+                "INSERT INTO entry_ado_items (entry_id, link_type_id, value, position) VALUES (?, 1, ?, 0)",
+                (cur.lastrowid, str(pos)),
+            )
+        conn.commit()
+    db.check_rollups(db_path, repair=True)
+    return ids
+
+
+# --- Benchmarks ---
+
+SERVE_PATHS = [
+    "/api/entries",
+    "/api/undo-status",
+    "/api/accounts",
+    "/api/link-types",
+    "/static/app.js",
+    "/api/undo-status",
+    "/static/style.css",
+]
+
+
+def _load_clients(port, clients, seconds):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(offset):
+        local = []
+        i = offset
+        while time.perf_counter() < deadline:
+            path = SERVE_PATHS[i % len(SERVE_PATHS)]
+            i += 1
+            t0 = time.perf_counter()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            conn.request("GET", path)
+            conn.getresponse().read()
+            conn.close()
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return len(latencies) / elapsed, _percentile(latencies, 50), _percentile(latencies, 99)
+
+
+def bench_serve(args, db_path):
+    """Requests/second and latency of a page-load request mix vs. client count."""
+    import logging
+    import server
+
+    logging.getLogger("quokka").setLevel(logging.WARNING)
+    seed_db(db_path, days=args.days)
+    server.DB_PATH = db_path
+    client_counts = [int(c) for c in args.clients.split(",")]
+    print(f"{'mode':<10} {'clients':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for mode in ("single", "threaded"):
+        httpd = server.create_server(0, mode, args.workers)
+        port = httpd.server_address[1]
+        t = threading.Thread(target=httpd.serve_forever, daemon=True)
+        t.start()
+        try:
+            for clients in client_counts:
+                rps, p50, p99 = _load_clients(port, clients, args.seconds)
+                print(f"{mode:<10} {clients:>7} {rps:>9.1f} {p50 * 1000:>9.2f} {p99 * 1000:>9.2f}")
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+def bench_connections(args, db_path):
+    """Per-call latency of typical page-load reads: connect-per-call vs. pooled."""
+    seed_db(db_path, days=args.days)
+    today = datetime.date.today()
+    week_ago = (today - datetime.timedelta(days=6)).isoformat()
+    calls = [
+        ("list_accounts", lambda: db.list_accounts(db_path)),
+        ("list_link_types", lambda: db.list_link_types(db_path)),
+        ("undo_status", lambda: db.undo_status(db_path)),
+        ("list_entries (7 days)", lambda: db.list_entries(db_path, week_ago, today.isoformat())),
+    ]
+    tuned = dict(db.PRAGMAS)
+    setups = [
+        # Mirrors the original get_connection: fresh connection, default journal.
+        ("connect-per-call", 0, {"journal_mode": "DELETE"}),
+        ("pooled", db.POOL_SIZE, tuned),
+    ]
+    print(f"{'setup':<18} {'call':<24} {'mean us':>9} {'p99 us':>9}")
+    for label, pool_size, pragmas in setups:
+        db.PRAGMAS.clear()
+        db.configure(pool_size=pool_size, pragmas=pragmas)
+        for name, fn in calls:
+            fn()
+            mean, p99 = _timeit(fn, args.iterations)
+            print(f"{label:<18} {name:<24} {mean * 1e6:>9.1f} {p99 * 1e6:>9.1f}")
+    db.PRAGMAS.clear()
+    db.configure(pragmas=tuned)
+
+
+def bench_mutations(args, db_path):
+    """Latency and statement count of reorder on large days, and of link, undo and redo on large groups."""
+    seed_db(db_path, days=30)
+    print(f"{'operation':<26} {'size':>6} {'stmts':>7} {'mean ms':>9} {'p99 ms':>9}")
+    for size in (10, 30, 100, 300):
+        ids = _add_day(db_path, f"2000-01-{size % 28 + 1:02d}", size)
+        flip = [0]
+
+        def reorder():
+            # Alternate moving the last entry to the top and the first to the end
+            flip[0] ^= 1
+            if flip[0]:
+                db.reorder_entry(db_path, ids[-1], ids[0])
+            else:
+                db.reorder_entry(db_path, ids[-1], None)
+
+        _, stmts = _count_statements(db_path, reorder)
+        mean, p99 = _timeit(reorder, args.iterations)
+        print(f"{'reorder_entry (day)':<26} {size:>6} {stmts:>7} {mean * 1000:>9.2f} {p99 * 1000:>9.2f}")
+    for size in (10, 50, 200):
+        group = f"bench-group-{size}"
+        _add_day(db_path, "2001-01-01", size, group_id=group)
+        (single,) = _add_day(db_path, "2001-01-02", 1)
+        members = [r["id"] for r in db.get_group_entries(db_path, group)]
+        link, undo, redo = [], [], []
+        _, stmts = _count_statements(db_path, lambda: db.link_entries(db_path, single, members[0]))
+        _, undo_stmts = _count_statements(db_path, lambda: db.perform_undo(db_path))
+        _, redo_stmts = _count_statements(db_path, lambda: db.perform_redo(db_path))
+        db.perform_undo(db_path)
+        for _ in range(args.iterations):
+            for samples, fn in ((link, lambda: db.link_entries(db_path, single, members[0])),
+                                (undo, lambda: db.perform_undo(db_path)),
+                                (redo, lambda: db.perform_redo(db_path)),
+                                (None, lambda: db.perform_undo(db_path))):
+                t0 = time.perf_counter()
+                fn()
+                if samples is not None:
+                    samples.append(time.perf_counter() - t0)
+        for name, count, samples in (("link_entries (group)", stmts, link),
+                                     ("perform_undo (link)", undo_stmts, undo),
+                                     ("perform_redo (link)", redo_stmts, redo)):
+            mean = sum(samples) / len(samples)
+            print(f"{name:<26} {size:>6} {count:>7} {mean * 1000:>9.2f} "
+                  f"{_percentile(samples, 99) * 1000:>9.2f}")
+
+
+def bench_suggest(args, db_path):
+    """Latency and response size of suggest_groups on a large history."""
+    import json
+
+    per_day = 6
+    t0 = time.perf_counter()
+    seed_db(db_path, days=-(-args.entries // per_day), per_day=per_day)
+    print(f"seeded {args.entries} entries in {time.perf_counter() - t0:.1f}s")
+    with db.get_connection(db_path) as conn:
+        max_id = conn.execute("SELECT MAX(id) FROM entries").fetchone()[0]
+    rng = random.Random(2)
+    sources = [rng.randint(1, max_id) for _ in range(args.iterations)]
+    print(f"{'query':<26} {'mean ms':>9} {'p99 ms':>9} {'kB':>7}")
+    for label, kwargs in (("similar (page 1)", {}), ("filter q='rev'", {"q": "rev"}),
+                          ("filter q='123'", {"q": "123"})):
+        samples = []
+        size = 0
+        for source in sources:
+            t0 = time.perf_counter()
+            result = db.suggest_groups(db_path, source, **kwargs)
+            samples.append(time.perf_counter() - t0)
+            size += len(json.dumps(result))
+        mean = sum(samples) / len(samples)
+        print(f"{label:<26} {mean * 1000:>9.2f} {_percentile(samples, 99) * 1000:>9.2f} "
+              f"{size / len(sources) / 1024:>7.1f}")
+
+
+def _write_clients(db_path, entry_ids, clients, seconds):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(entry_id):
+        local = []
+        n = 0
+        while time.perf_counter() < deadline:
+            n += 1
+            t0 = time.perf_counter()
+            db.update_entry(db_path, entry_id, {"notes": f"edit {n}"})
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(entry_ids[n],)) for n in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return len(latencies) / elapsed, _percentile(latencies, 50), _percentile(latencies, 99)
+
+
+def bench_writes(args, db_path):
+    """Writes/second and latency of concurrent single-entry edits, one commit per
+    edit (group size 1) vs. group commit, at synchronous NORMAL and FULL."""
+    seed_db(db_path, days=30)
+    client_counts = [int(c) for c in args.clients.split(",")]
+    with db.get_connection(db_path) as conn:
+        entry_ids = [r[0] for r in conn.execute(
+            "SELECT id FROM entries ORDER BY id LIMIT ?", (max(client_counts),)
+        ).fetchall()]
+    default_batch = db.WRITER_BATCH
+    synchronous = db.PRAGMAS["synchronous"]
+    print(f"{'synchronous':<12} {'group':>5} {'clients':>7} {'writes/s':>9} "
+          f"{'p50 ms':>9} {'p99 ms':>9} {'per commit':>10}")
+    try:
+        for sync in ("NORMAL", "FULL"):
+            db.configure(pragmas={"synchronous": sync})
+            for batch in (1, default_batch):
+                db.configure(writer_batch=batch)
+                for clients in client_counts:
+                    before = db.writer_stats()
+                    wps, p50, p99 = _write_clients(db_path, entry_ids, clients, args.seconds)
+                    after = db.writer_stats()
+                    groups = after["groups"] - before["groups"]
+                    per_commit = (after["jobs"] - before["jobs"]) / groups if groups else 0
+                    print(f"{sync:<12} {batch:>5} {clients:>7} {wps:>9.1f} "
+                          f"{p50 * 1000:>9.2f} {p99 * 1000:>9.2f} {per_commit:>10.2f}")
+    finally:
+        db.configure(pragmas={"synchronous": synchronous}, writer_batch=default_batch)
+
+
+def bench_startup(args, db_path):
+    """Cost of init_db on an up-to-date database vs. re-running every migration
+    plus the full rollup check, as each startup used to."""
+    per_day = 6
+    seed_db(db_path, days=-(-args.entries // per_day), per_day=per_day)
+
+    def reset_version():
+        with db.get_connection(db_path, write=True) as conn:
+            conn.execute("PRAGMA user_version = 0")
+
+    def legacy():
+        db.init_db(db_path)
+        db.check_rollups(db_path, repair=True)
+
+    print(f"{'startup':<34} {'stmts':>7} {'mean ms':>9} {'p99 ms':>9}")
+    for label, prepare, fn in (("init_db (up to date)", lambda: None, lambda: db.init_db(db_path)),
+                               ("all migrations + check_rollups", reset_version, legacy)):
+        prepare()
+        _, stmts = _count_statements(db_path, fn)
+        samples = []
+        for _ in range(args.iterations):
+            prepare()
+            db.close_all()  # a fresh process has no pooled connections
+            t0 = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t0)
+        mean = sum(samples) / len(samples)
+        print(f"{label:<34} {stmts:>7} {mean * 1000:>9.2f} {_percentile(samples, 99) * 1000:>9.2f}")
+
+
+# Tables small enough (and always read whole) that a scan is the right plan
+PLAN_SMALL_TABLES = {"imputation_accounts", "ado_link_types", "app_meta", "sqlite_sequence"}
+
+
+def _plan_workload(db_path):
+    """Return (label, call, whole) for every public db function, with arguments
+    taken from the seeded data. Calls marked whole read or rebuild the entire
+    database, or take the search table scan that terms too short for the
+    trigram index fall back to, by design: their scans are reported but not
+    failed."""
+    today = datetime.date.today()
+    week_ago = (today - datetime.timedelta(days=6)).isoformat()
+    month_ago = (today - datetime.timedelta(days=30)).isoformat()
+    ids = [e["id"] for e in db.list_entries(db_path, week_ago, today.isoformat())]
+    version = db.change_version(db_path)
+    state = {}
+
+    def create_entry():
+        state["entry"] = db.create_entry(db_path, {
+            "date": today.isoformat(), "duration": 30, "description": "review 4242",
+            "splits": [{"account_id": 1, "duration": 30}],
+            "ado_items": [{"link_type_id": 1, "value": "4242"}],
+        })["entry"]["id"]
+
+    def duplicate_entry():
+        db.duplicate_entry(db_path, ids[0], today.isoformat(), link=True)
+        state["group"] = db.get_entries(db_path, [ids[0]])[0]["group_id"]
+
+    def create_account():
+        state["account"] = db.create_account(db_path, "PLAN-1", "plan account")["id"]
+
+    def create_link_type():
+        state["link_type"] = db.create_link_type(db_path, "Plan")["id"]
+
+    page = lambda: db.list_entries_page(db_path, days=7)
+    return [
+        ("list_accounts", lambda: db.list_accounts(db_path, include_inactive=True), False),
+        ("list_link_types", lambda: db.list_link_types(db_path), False),
+        ("list_entries", lambda: db.list_entries(db_path, week_ago, today.isoformat()), False),
+        ("list_entries (from)", lambda: db.list_entries(db_path, week_ago), False),
+        ("get_entries", lambda: db.get_entries(db_path, ids[:5]), False),
+        ("list_entries_page", page, False),
+        ("list_entries_page (cursor)",
+         lambda: db.list_entries_page(db_path, days=7, cursor=page()["next_cursor"]), False),
+        ("undo_status", lambda: db.undo_status(db_path), False),
+        ("list_changes", lambda: db.list_changes(db_path, version), False),
+        ("suggest_groups", lambda: db.suggest_groups(db_path, ids[0]), False),
+        ("suggest_groups (q)", lambda: db.suggest_groups(db_path, ids[0], q="rev"), False),
+        ("suggest_groups (short q)", lambda: db.suggest_groups(db_path, ids[0], q="42"), True),
+        ("imputation_report", lambda: [db.imputation_report(db_path, month_ago, today.isoformat(), g)
+                                       for g in db.REPORT_GROUPINGS], False),
+        ("search_entries", lambda: db.search_entries(db_path, "review", date_from=month_ago), False),
+        ("search_entries (page 2)", lambda: db.search_entries(db_path, "review", cursor="50"), False),
+        ("create_entry", create_entry, False),
+        ("update_entry", lambda: db.update_entry(db_path, state["entry"], {
+            **db.get_entries(db_path, [state["entry"]])[0], "description": "changed"}), False),
+        ("reorder_entry", lambda: db.reorder_entry(db_path, state["entry"], ids[0]), False),
+        ("reorder_entry (end)", lambda: db.reorder_entry(db_path, state["entry"], None), False),
+        ("duplicate_entry", duplicate_entry, False),
+        ("get_group_entries", lambda: db.get_group_entries(db_path, state["group"]), False),
+        ("update_group_shared",
+         lambda: db.update_group_shared(db_path, state["group"], {"description": "shared"}), False),
+        ("link_entries", lambda: db.link_entries(db_path, ids[1], ids[0]), False),
+        ("ungroup_entry", lambda: db.ungroup_entry(db_path, ids[1]), False),
+        ("perform_undo", lambda: db.perform_undo(db_path), False),
+        ("perform_redo", lambda: db.perform_redo(db_path), False),
+        ("perform_batch", lambda: db.perform_batch(db_path, [
+            {"op": "reorder", "id": ids[2], "before_id": ids[3]},
+            {"op": "delete", "id": state["entry"]},
+        ]), False),
+        ("delete_entry", lambda: db.delete_entry(db_path, ids[4]), False),
+        ("create_account", create_account, False),
+        ("update_account", lambda: db.update_account(db_path, state["account"], description="x"), False),
+        ("delete_account", lambda: db.delete_account(db_path, state["account"]), False),
+        ("create_link_type", create_link_type, False),
+        ("update_link_type", lambda: db.update_link_type(db_path, state["link_type"], title="Plan 2"), False),
+        ("delete_link_type", lambda: db.delete_link_type(db_path, state["link_type"]), False),
+        ("import_entries", lambda: db.import_entries(db_path, [{
+            "date": today.isoformat(), "entry_id": "1", "duration": "30", "description": "imported",
+            "notes": "", "group_id": "", "account_number": "A0001", "account_project": "",
+            "account_description": "", "imputed_duration": "30", "ado_items": "Work Item:77",
+        }]), False),
+        ("changes_since", lambda: db.changes_since(db_path, version), False),
+        ("backup_mark", lambda: (db.set_backup_mark(db_path, version, 0), db.backup_mark(db_path)), False),
+        ("iter_export_rows (range)",
+         lambda: list(db.iter_export_rows(db_path, month_ago, today.isoformat())), False),
+        ("iter_export_rows (from)", lambda: list(db.iter_export_rows(db_path, month_ago)), False),
+        ("search_entries (short term)", lambda: db.search_entries(db_path, "re"), True),
+        ("iter_export_rows", lambda: list(db.iter_export_rows(db_path)), True),
+        ("check_rollups", lambda: db.check_rollups(db_path), True),
+    ]
+
+
+def _full_scans(conn, sql, tables):
+    """Return the plan lines of sql that scan one of `tables` in full. A scan in
+    index order under a LIMIT stops early, and a full-text table scan driven
+    by MATCH, an indexed LIKE/GLOB or a rowid (FTS5 index string M, L, G, =)
+    reads only the matching rows, so neither counts."""
+    scans = []
+    for row in conn.execute("EXPLAIN QUERY PLAN " + sql):
+        detail = row["detail"]
+        match = re.match(r"SCAN (\w+)", detail)
+        if not match or re.search(r"VIRTUAL TABLE INDEX \d+:\S*[MLG=]", detail):
+            continue
+        name = match.group(1)
+        if name not in tables:
+            alias = re.search(rf"\b(?:FROM|JOIN)\s+(\w+)\s+(?:AS\s+)?{name}\b", sql, re.I)
+            if not alias or alias.group(1) not in tables:
+                continue
+        if re.search(r"USING (?:COVERING )?INDEX", detail) and re.search(r"\bLIMIT\b", sql, re.I):
+            continue
+        scans.append(detail)
+    return scans
+
+
+def bench_plans(args, db_path):
+    """EXPLAIN QUERY PLAN every statement the public db functions run, against a
+    large history; exit non-zero if any of them scans a whole table."""
+    seed_db(db_path, days=args.days)
+    db.close_all()
+    captured = []
+    current = [("setup", True)]
+    open_connection = db._open_connection
+
+    def traced(path):
+        conn = open_connection(path)
+        conn.set_trace_callback(lambda sql: captured.append((current[0], sql)))
+        return conn
+
+    db._open_connection = traced
+    try:
+        for label, call, whole in _plan_workload(db_path):
+            current[0] = (label, whole)
+            call()
+    finally:
+        db._open_connection = open_connection
+        db.close_all()
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    tables -= PLAN_SMALL_TABLES
+    seen = set()
+    checked = failures = 0
+    for (label, whole), sql in captured:
+        if not re.match(r"\s*(SELECT|INSERT|UPDATE|DELETE|WITH|REPLACE)\b", sql, re.I):
+            continue
+        shape = re.sub(r"'(?:[^']|'')*'|\b\d+\b", "?", " ".join(sql.split()))
+        # Per call: a statement exempt under one label must still pass under another
+        if (label, shape) in seen:
+            continue
+        seen.add((label, shape))
+        checked += 1
+        scans = _full_scans(conn, sql, tables)
+        if scans:
+            failures += not whole
+            print(f"{'SCAN' if not whole else 'scan (whole)'}  {label}\n    {shape[:200]}")
+            for detail in scans:
+                print(f"      {detail}")
+    conn.close()
+    print(f"{checked} statements checked, {failures} full table scans")
+    if failures:
+        raise SystemExit(1)
+
+
+BENCHMARKS = {
+    "connections": bench_connections,
+    "mutations": bench_mutations,
+    "plans": bench_plans,
+    "serve": bench_serve,
+    "startup": bench_startup,
+    "suggest": bench_suggest,
+    "writes": bench_writes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quokka benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--days", type=int, default=365, help="days of synthetic history")
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration of each load run")
+    parser.add_argument("--clients", default="1,2,4,8,16", help="comma-separated client counts")
+    parser.add_argument("--workers", type=int, default=8, help="worker threads in threaded mode")
+    parser.add_argument("--iterations", type=int, default=None, help="calls per microbenchmark")
+    parser.add_argument("--entries", type=int, default=100000, help="entries seeded for suggest and startup")
+    args = parser.parse_args()
+    if args.iterations is None:
+        args.iterations = {"mutations": 50, "suggest": 50, "startup": 5}.get(args.benchmark, 500)
+    tmp_dir = tempfile.mkdtemp(prefix="quokka-bench-")
+    try:
+        BENCHMARKS[args.benchmark](args, os.path.join(tmp_dir, "bench.db"))
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Quokka - Command-line tools.
+
+    python cli.py import FILE [--format csv|ndjson] [--database PATH]
+    python cli.py check-rollups [--repair] [--database PATH]
+    python cli.py restore OUTPUT [--at "YYYY-MM-DD HH:MM"] [--database PATH]
+"""
+
+import argparse
+import datetime
+import os
+import sys
+
+import db
+import server
+
+
+def cmd_import(args):
+    fmt = args.format or ("ndjson" if args.file.endswith((".ndjson", ".jsonl")) else "csv")
+    db.init_db(args.database)
+    with open(args.file, "rb") as f:
+        result = server.import_stream(args.database, f, fmt)
+    if not result["ok"]:
+        print(f"Import failed at row {result['line']}: {result['error']}", file=sys.stderr)
+        return 1
+    print(f"Imported {result['entries']} entries, {result['splits']} splits, "
+          f"{result['ado_items']} ADO items from {result['rows']} rows "
+          f"in {result['seconds']:.2f}s ({result['rows_per_second']} rows/s)")
+    return 0
+
+
+def cmd_check_rollups(args):
+    result = db.check_rollups(args.database, repair=args.repair)
+    if result["ok"]:
+        print("Daily rollups are consistent")
+        return 0
+    action = "rebuilt" if result["repaired"] else "run with --repair to rebuild"
+    print(f"{result['mismatches']} rollup rows differ from the entries ({action})")
+    return 0 if result["repaired"] else 1
+
+
+def cmd_restore(args):
+    at = datetime.datetime.fromisoformat(args.at) if args.at else None
+    try:
+        result = server.restore_backup(args.database, os.path.abspath(args.output), at)
+    except ValueError as e:
+        print(f"Restore failed: {e}", file=sys.stderr)
+        return 1
+    print(f"Restored {os.path.basename(result['full'])} plus {result['increments']} increments "
+          f"(change version {result['version']}) to {args.output}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quokka command-line tools")
+    parser.add_argument("--database", default=server.DB_PATH, help="database file (default: from config.json)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("import", help="import entries from a CSV or NDJSON export")
+    p.add_argument("file")
+    p.add_argument("--format", choices=sorted(server.IMPORT_FORMATS))
+    p.set_defaults(func=cmd_import)
+    p = sub.add_parser("check-rollups", help="verify (and optionally rebuild) the daily rollups")
+    p.add_argument("--repair", action="store_true")
+    p.set_defaults(func=cmd_check_rollups)
+    p = sub.add_parser("restore", help="rebuild the database from its backups into a new file")
+    p.add_argument("output")
+    p.add_argument("--at", help="point in time to restore (default: the latest backup)")
+    p.set_defaults(func=cmd_restore)
+    args = parser.parse_args()
+    args.database = os.path.abspath(args.database)
+    try:
+        return args.func(args)
+    finally:
+        db.close_all()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,145 +1,653 @@
 import sqlite3
+import datetime
+import hashlib
 import os
+import heapq
+import queue
+import re
+import sys
 import uuid
 import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
 from contextlib import contextmanager
 
-
-@contextmanager
-def get_connection(db_path):
-    conn = sqlite3.connect(db_path)
+# Connections are kept open and reused across requests. POOL_SIZE bounds how
+# many idle connections are kept per database; extra ones are closed on release.
+POOL_SIZE = 4
+STATEMENT_CACHE_SIZE = 256
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Writers are serialized in-process so concurrent requests never race for
+# sqlite's write lock; readers are not blocked by it.
+_write_lock = threading.RLock()
+
+# Data versions: one counter per table in app_meta ('data_version_<table>'),
+# bumped by _touch inside the writing transaction. Writes from any process
+# (the CLI included) change them, and a reader sees the versions matching its
+# snapshot.
+DATA_TABLES = ("entries", "accounts", "link_types")
+_data_epoch = uuid.uuid4().hex[:8]  # a restart (or a restored file) invalidates every token
+
+
+def configure(pool_size=None, pragmas=None, undo_stack_limit=None, entry_cache_size=None,
+              writer_batch=None):
+    """Override the pool size, connection pragmas (merged into PRAGMAS), undo
+    depth, hydrated-entry cache size and/or writer group size."""
+    global POOL_SIZE, UNDO_STACK_LIMIT, ENTRY_CACHE_SIZE, WRITER_BATCH
+    if writer_batch is not None:
+        WRITER_BATCH = max(1, int(writer_batch))
+    if pool_size is not None:
+        POOL_SIZE = max(0, int(pool_size))
+    if undo_stack_limit is not None:
+        UNDO_STACK_LIMIT = max(1, int(undo_stack_limit))
+    if entry_cache_size is not None:
+        ENTRY_CACHE_SIZE = max(0, int(entry_cache_size))
+        _trim_entry_cache()
+    if pragmas:
+        PRAGMAS.update(pragmas)
+    close_all()
+
+
+def close_all():
+    """Close every idle pooled connection."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class _Connection(sqlite3.Connection):
+    """A connection that remembers its database path, for the in-process caches."""
+
+    def __init__(self, db_path, *args, **kwargs):
+        super().__init__(db_path, *args, **kwargs)
+        self.db_path = db_path
+
+
+def _open_connection(db_path):
+    conn = sqlite3.connect(
+        db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE,
+        factory=_Connection,
+    )
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def _get_pool(db_path):
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = queue.LifoQueue()
+        return pool
+
+
+@contextmanager
+def get_connection(db_path, write=False):
+    if write:
+        _write_lock.acquire()
     try:
-        yield conn
+        pool = _get_pool(db_path)
+        try:
+            conn = pool.get_nowait()
+        except queue.Empty:
+            conn = _open_connection(db_path)
+        try:
+            yield conn
+        except BaseException:
+            conn.close()
+            raise
+        else:
+            # Uncommitted work is discarded, as closing the connection would.
+            if conn.in_transaction:
+                conn.rollback()
+            if pool.qsize() < POOL_SIZE:
+                pool.put(conn)
+            else:
+                conn.close()
     finally:
-        conn.close()
+        if write:
+            _write_lock.release()
 
 
-def init_db(db_path):
+def _touch(conn, *tables):
+    """Bump the data version of tables, as part of conn's write transaction."""
+    conn.executemany(
+        "INSERT INTO app_meta (key, value) VALUES (?, 1) ON CONFLICT(key) DO UPDATE SET value = value + 1",
+        [(f"data_version_{t}",) for t in tables],
+    )
+
+
+def _data_versions(conn, tables):
+    """Return the data versions of tables, as of conn's snapshot."""
+    keys = [f"data_version_{t}" for t in tables]
+    rows = dict(conn.execute(
+        f"SELECT key, value FROM app_meta WHERE key IN ({','.join('?' * len(keys))})", keys
+    ).fetchall())
+    return tuple(rows.get(k, 0) for k in keys)
+
+
+def data_version(db_path, *tables):
+    """Return an opaque token that changes whenever any of tables is written."""
     with get_connection(db_path) as conn:
-        conn.executescript("""
-            CREATE TABLE IF NOT EXISTS imputation_accounts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                number TEXT NOT NULL UNIQUE,
-                description TEXT NOT NULL DEFAULT '',
-                project TEXT NOT NULL DEFAULT '',
-                open_date TEXT,
-                close_date TEXT,
-                active INTEGER NOT NULL DEFAULT 1
-            );
+        versions = _data_versions(conn, tables)
+    return "-".join([_data_epoch] + [str(v) for v in versions])
 
-            CREATE TABLE IF NOT EXISTS entries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                duration INTEGER NOT NULL,
-                description TEXT NOT NULL DEFAULT '',
-                notes TEXT NOT NULL DEFAULT '',
-                ado_workitem TEXT NOT NULL DEFAULT '',
-                ado_pr TEXT NOT NULL DEFAULT '',
-                imputation_account_id INTEGER,
-                imputation_duration INTEGER,
-                group_id TEXT,
-                FOREIGN KEY (imputation_account_id) REFERENCES imputation_accounts(id)
-            );
 
-            CREATE INDEX IF NOT EXISTS idx_entries_date ON entries(date);
+def checkpoint(db_path):
+    """Fold the WAL back into the main database file."""
+    with get_connection(db_path) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
 
-            CREATE TABLE IF NOT EXISTS undo_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                action_type TEXT NOT NULL,
-                before_state TEXT NOT NULL,
-                after_state TEXT NOT NULL,
-                created_at TEXT NOT NULL DEFAULT (datetime('now')),
-                undone INTEGER NOT NULL DEFAULT 0
-            );
-        """)
-        # Migration: add project column if missing
-        cols = [r[1] for r in conn.execute("PRAGMA table_info(imputation_accounts)").fetchall()]
-        if "project" not in cols:
-            conn.execute("ALTER TABLE imputation_accounts ADD COLUMN project TEXT NOT NULL DEFAULT ''")
-        # Migration: add open_date/close_date to accounts if missing
-        if "open_date" not in cols:
-            conn.execute("ALTER TABLE imputation_accounts ADD COLUMN open_date TEXT")
-        if "close_date" not in cols:
-            conn.execute("ALTER TABLE imputation_accounts ADD COLUMN close_date TEXT")
-        # Migration: add group_id column if missing
-        entry_cols = [r[1] for r in conn.execute("PRAGMA table_info(entries)").fetchall()]
-        if "group_id" not in entry_cols:
-            conn.execute("ALTER TABLE entries ADD COLUMN group_id TEXT")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_group_id ON entries(group_id)")
-        # Migration: create entry_imputations table
-        conn.executescript("""
-            CREATE TABLE IF NOT EXISTS entry_imputations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                entry_id INTEGER NOT NULL,
-                account_id INTEGER NOT NULL,
-                duration INTEGER NOT NULL,
-                position INTEGER NOT NULL DEFAULT 0,
-                FOREIGN KEY (entry_id) REFERENCES entries(id) ON DELETE CASCADE,
-                FOREIGN KEY (account_id) REFERENCES imputation_accounts(id)
-            );
-            CREATE INDEX IF NOT EXISTS idx_entry_imputations_entry
-                ON entry_imputations(entry_id);
+
+BACKUP_STEP_PAGES = 256
+BACKUP_STEP_SLEEP = 0.005
+
+
+def backup(db_path, dest_path):
+    """Copy a consistent snapshot of the live database (WAL included) to dest_path.
+
+    Pages are copied BACKUP_STEP_PAGES at a time with a short pause between
+    steps, so requests keep being served. The source holds one read snapshot
+    throughout, so commits made meanwhile neither restart nor leak into the
+    copy. Returns {"integrity", "version", "reference"}: the result of PRAGMA
+    integrity_check on the copy ("ok" when it is sound), and the change version
+    and reference fingerprint the copy was taken at (see backup_mark), both
+    None for a database that init_db has not migrated yet.
+    """
+    dest = sqlite3.connect(dest_path)
+    try:
+        with get_connection(db_path) as conn:
+            conn.execute("BEGIN")  # one read snapshot for the copy and its version
+            version = reference = None
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'app_meta'").fetchone():
+                version = _current_version(conn)
+                reference = _reference_fingerprint(conn)
+            conn.backup(dest, pages=BACKUP_STEP_PAGES, sleep=BACKUP_STEP_SLEEP)
+        integrity = "\n".join(r[0] for r in dest.execute("PRAGMA integrity_check").fetchall())
+        if version is not None:
+            # Lets a restore tell when the copy was taken; not a tracked change
+            dest.execute(
+                "INSERT OR REPLACE INTO app_meta (key, value) VALUES ('backup_taken_at', ?)", (int(time.time()),)
+            )
+            dest.commit()
+        return {"integrity": integrity, "version": version, "reference": reference}
+    finally:
+        dest.close()
+
+
+# --- Writer queue ---
+
+# Mutations run as jobs on one writer thread per database. The writer takes
+# every job already queued (up to WRITER_BATCH) and applies them in a single
+# transaction, each inside its own savepoint, so a burst of edits costs one
+# commit while every caller still gets its own result, undo step and errors.
+WRITER_BATCH = 64
+
+_writers = {}
+_writers_lock = threading.Lock()
+_writer_local = threading.local()
+_writer_stats = {"jobs": 0, "groups": 0, "largest_group": 0}
+
+
+class _JobConnection:
+    """The writer's connection as one job sees it: commit() and rollback()
+    act on the job's savepoint, and the group's transaction is committed by
+    the writer once every job in it has run."""
+
+    uncommitted = True  # reads through it may see writes that are not durable yet
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self):
+        self._conn.execute("RELEASE job")
+        self._conn.execute("SAVEPOINT job")
+
+    def rollback(self):
+        self._conn.execute("ROLLBACK TO job")
+
+
+def _run_group(db_path, group):
+    outcomes = []
+    try:
+        with get_connection(db_path, write=True) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            job_conn = _writer_local.conn = _JobConnection(conn)
+            try:
+                for fn, future in group:
+                    conn.execute("SAVEPOINT job")
+                    try:
+                        outcomes.append((future, fn(job_conn), None))
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO job")
+                        outcomes.append((future, None, e))
+                    conn.execute("RELEASE job")
+            finally:
+                _writer_local.conn = None
+            conn.commit()
+    except Exception as e:
+        # The transaction itself failed: no job in the group was applied
+        for _, future in group:
+            future.set_exception(e)
+        return
+    _writer_stats["jobs"] += len(group)
+    _writer_stats["groups"] += 1
+    _writer_stats["largest_group"] = max(_writer_stats["largest_group"], len(group))
+    for future, result, error in outcomes:
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+
+def _writer_loop(db_path, jobs):
+    while True:
+        group = [jobs.get()]
+        while len(group) < WRITER_BATCH:
+            try:
+                group.append(jobs.get_nowait())
+            except queue.Empty:
+                break
+        _run_group(db_path, group)
+
+
+def _submit(db_path, fn):
+    """Run fn(conn) as a job on the database's writer thread and return its result.
+
+    fn must do all its work through conn; its commit() and rollback() only
+    end or undo that job. Called from inside a job, fn runs inline.
+    """
+    conn = getattr(_writer_local, "conn", None)
+    if conn is not None:
+        return fn(conn)
+    with _writers_lock:
+        jobs = _writers.get(db_path)
+        if jobs is None:
+            jobs = _writers[db_path] = queue.Queue()
+            threading.Thread(
+                target=_writer_loop, args=(db_path, jobs), name="quokka-writer", daemon=True,
+            ).start()
+    future = Future()
+    jobs.put((fn, future))
+    return future.result()
+
+
+def writer_stats():
+    """Return the number of jobs and groups committed by the writer threads."""
+    stats = dict(_writer_stats)
+    stats["mean_group"] = round(stats["jobs"] / stats["groups"], 2) if stats["groups"] else None
+    stats["queued"] = sum(jobs.qsize() for jobs in list(_writers.values()))
+    return stats
+
+
+# --- Schema migrations ---
+
+# Each step brings the schema from one PRAGMA user_version to the next, in its
+# own transaction. Databases created before user_version was used are at 0 in
+# any earlier state, so the steps up to _migrate_rollups check before they
+# change anything; later steps can rely on the ones before them.
+
+def _run_script(conn, script):
+    """Run the statements of script inside the current transaction
+    (executescript would commit it first)."""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+
+
+def _migrate_base(conn):
+    """Core tables, plus the account and group columns added to them early on."""
+    _run_script(conn, """
+        CREATE TABLE IF NOT EXISTS imputation_accounts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            number TEXT NOT NULL UNIQUE,
+            description TEXT NOT NULL DEFAULT '',
+            project TEXT NOT NULL DEFAULT '',
+            open_date TEXT,
+            close_date TEXT,
+            active INTEGER NOT NULL DEFAULT 1
+        );
+
+        CREATE TABLE IF NOT EXISTS entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            duration INTEGER NOT NULL,
+            description TEXT NOT NULL DEFAULT '',
+            notes TEXT NOT NULL DEFAULT '',
+            ado_workitem TEXT NOT NULL DEFAULT '',
+            ado_pr TEXT NOT NULL DEFAULT '',
+            imputation_account_id INTEGER,
+            imputation_duration INTEGER,
+            group_id TEXT,
+            FOREIGN KEY (imputation_account_id) REFERENCES imputation_accounts(id)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_entries_date ON entries(date);
+
+        CREATE TABLE IF NOT EXISTS undo_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            action_type TEXT NOT NULL,
+            before_state TEXT NOT NULL,
+            after_state TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            undone INTEGER NOT NULL DEFAULT 0
+        );
+    """)
+    # Migration: add project column if missing
+    cols = [r[1] for r in conn.execute("PRAGMA table_info(imputation_accounts)").fetchall()]
+    if "project" not in cols:
+        conn.execute("ALTER TABLE imputation_accounts ADD COLUMN project TEXT NOT NULL DEFAULT ''")
+    # Migration: add open_date/close_date to accounts if missing
+    if "open_date" not in cols:
+        conn.execute("ALTER TABLE imputation_accounts ADD COLUMN open_date TEXT")
+    if "close_date" not in cols:
+        conn.execute("ALTER TABLE imputation_accounts ADD COLUMN close_date TEXT")
+    # Migration: add group_id column if missing
+    entry_cols = [r[1] for r in conn.execute("PRAGMA table_info(entries)").fetchall()]
+    if "group_id" not in entry_cols:
+        conn.execute("ALTER TABLE entries ADD COLUMN group_id TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_group_id ON entries(group_id)")
+
+
+def _migrate_splits(conn):
+    """Split imputations: one row per entry and account."""
+    # Migration: create entry_imputations table
+    _run_script(conn, """
+        CREATE TABLE IF NOT EXISTS entry_imputations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id INTEGER NOT NULL,
+            account_id INTEGER NOT NULL,
+            duration INTEGER NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (entry_id) REFERENCES entries(id) ON DELETE CASCADE,
+            FOREIGN KEY (account_id) REFERENCES imputation_accounts(id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_entry_imputations_entry
+            ON entry_imputations(entry_id);
+    """)
+    # Migrate existing single-account data to entry_imputations
+    has_old = conn.execute(
+        "SELECT COUNT(*) FROM entries WHERE imputation_account_id IS NOT NULL"
+    ).fetchone()[0]
+    has_new = conn.execute("SELECT COUNT(*) FROM entry_imputations").fetchone()[0]
+    if has_old and not has_new:
+        conn.execute("""
+            INSERT INTO entry_imputations (entry_id, account_id, duration, position)
+            SELECT id, imputation_account_id, COALESCE(imputation_duration, 0), 0
+            FROM entries WHERE imputation_account_id IS NOT NULL
         """)
-        # Migrate existing single-account data to entry_imputations
-        has_old = conn.execute(
-            "SELECT COUNT(*) FROM entries WHERE imputation_account_id IS NOT NULL"
-        ).fetchone()[0]
-        has_new = conn.execute("SELECT COUNT(*) FROM entry_imputations").fetchone()[0]
-        if has_old and not has_new:
+
+
+def _migrate_ado_items(conn):
+    """ADO link types and per-entry ADO items, replacing the fixed work item/PR columns."""
+    # Migration: create ado_link_types and entry_ado_items tables
+    _run_script(conn, """
+        CREATE TABLE IF NOT EXISTS ado_link_types (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            url_template TEXT NOT NULL DEFAULT '',
+            position INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS entry_ado_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id INTEGER NOT NULL,
+            link_type_id INTEGER NOT NULL,
+            value TEXT NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (entry_id) REFERENCES entries(id) ON DELETE CASCADE,
+            FOREIGN KEY (link_type_id) REFERENCES ado_link_types(id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS idx_entry_ado_items_entry
+            ON entry_ado_items(entry_id);
+    """)
+    # Seed default link types if table is empty
+    has_types = conn.execute("SELECT COUNT(*) FROM ado_link_types").fetchone()[0]
+    if not has_types:
+        conn.execute("INSERT INTO ado_link_types (title, url_template, position) VALUES (?, ?, ?)",
+                     ("Work Item", "", 0))
+        conn.execute("INSERT INTO ado_link_types (title, url_template, position) VALUES (?, ?, ?)",
+                     ("Pull Request", "", 1))
+    # Migrate existing ado_workitem/ado_pr data to entry_ado_items
+    has_ado_items = conn.execute("SELECT COUNT(*) FROM entry_ado_items").fetchone()[0]
+    if not has_ado_items:
+        wi_type = conn.execute("SELECT id FROM ado_link_types WHERE title = 'Work Item'").fetchone()
+        pr_type = conn.execute("SELECT id FROM ado_link_types WHERE title = 'Pull Request'").fetchone()
+        if wi_type:
             conn.execute("""
-                INSERT INTO entry_imputations (entry_id, account_id, duration, position)
-                SELECT id, imputation_account_id, COALESCE(imputation_duration, 0), 0
-                FROM entries WHERE imputation_account_id IS NOT NULL
-            """)
-        # Migration: create ado_link_types and entry_ado_items tables
-        conn.executescript("""
-            CREATE TABLE IF NOT EXISTS ado_link_types (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                url_template TEXT NOT NULL DEFAULT '',
-                position INTEGER NOT NULL DEFAULT 0
-            );
-            CREATE TABLE IF NOT EXISTS entry_ado_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                entry_id INTEGER NOT NULL,
-                link_type_id INTEGER NOT NULL,
-                value TEXT NOT NULL,
-                position INTEGER NOT NULL DEFAULT 0,
-                FOREIGN KEY (entry_id) REFERENCES entries(id) ON DELETE CASCADE,
-                FOREIGN KEY (link_type_id) REFERENCES ado_link_types(id) ON DELETE CASCADE
+                INSERT INTO entry_ado_items (entry_id, link_type_id, value, position)
+                SELECT id, ?, ado_workitem, 0 FROM entries WHERE ado_workitem != ''
+            """, (wi_type["id"],))
+        if pr_type:
+            conn.execute("""
+                INSERT INTO entry_ado_items (entry_id, link_type_id, value, position)
+                SELECT id, ?, ado_pr, 1 FROM entries WHERE ado_pr != ''
+            """, (pr_type["id"],))
+
+
+def _migrate_sort_order(conn):
+    """Manual ordering of entries within a day."""
+    # Migration: add sort_order column if missing
+    entry_cols = [r[1] for r in conn.execute("PRAGMA table_info(entries)").fetchall()]
+    if "sort_order" not in entry_cols:
+        conn.execute("ALTER TABLE entries ADD COLUMN sort_order INTEGER")
+
+
+def _migrate_change_feed(conn):
+    """Change feed: global change counter and the last version touching each entry."""
+    _run_script(conn, """
+        CREATE TABLE IF NOT EXISTS app_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS entry_versions (
+            entry_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_entry_versions_version
+            ON entry_versions(version);
+    """)
+
+
+def _migrate_undo_delta(conn):
+    """Delta-encoded undo records and the undo stack pointers."""
+    # Migration: delta-encoded undo records (older rows keep their full snapshots)
+    undo_cols = [r[1] for r in conn.execute("PRAGMA table_info(undo_log)").fetchall()]
+    if "format" not in undo_cols:
+        conn.execute("ALTER TABLE undo_log ADD COLUMN format INTEGER NOT NULL DEFAULT 1")
+        conn.execute("ALTER TABLE undo_log ADD COLUMN delta BLOB")
+    # Undo stack pointers: seeded once from the log, then maintained by every write
+    if conn.execute("SELECT 1 FROM app_meta WHERE key = 'undo_head'").fetchone() is None:
+        head = conn.execute("SELECT COALESCE(MAX(id), 0) FROM undo_log WHERE undone = 0").fetchone()[0]
+        undo_depth = conn.execute("SELECT COUNT(*) FROM undo_log WHERE undone = 0").fetchone()[0]
+        redo_depth = conn.execute("SELECT COUNT(*) FROM undo_log WHERE undone = 1").fetchone()[0]
+        _set_meta(conn, undo_head=head, undo_depth=undo_depth, redo_depth=redo_depth)
+
+
+def _migrate_suggest_indexes(conn):
+    """Suggestion indexes: ADO items by value and a word index over descriptions."""
+    # Kept in sync with entries by triggers
+    has_words = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'entry_words'"
+    ).fetchone()
+    _run_script(conn, """
+        CREATE INDEX IF NOT EXISTS idx_entry_ado_items_value
+            ON entry_ado_items(link_type_id, value);
+        CREATE VIRTUAL TABLE IF NOT EXISTS entry_words
+            USING fts5(description, content='entries', content_rowid='id');
+        CREATE TRIGGER IF NOT EXISTS entry_words_insert AFTER INSERT ON entries BEGIN
+            INSERT INTO entry_words (rowid, description) VALUES (new.id, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS entry_words_delete AFTER DELETE ON entries BEGIN
+            INSERT INTO entry_words (entry_words, rowid, description)
+            VALUES ('delete', old.id, old.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS entry_words_update AFTER UPDATE OF description ON entries BEGIN
+            INSERT INTO entry_words (entry_words, rowid, description)
+            VALUES ('delete', old.id, old.description);
+            INSERT INTO entry_words (rowid, description) VALUES (new.id, new.description);
+        END;
+    """)
+    if not has_words:
+        conn.execute("INSERT INTO entry_words (entry_words) VALUES ('rebuild')")
+
+
+def _migrate_search(conn):
+    """Full-text search over descriptions, notes and ADO values."""
+    # One trigram-indexed row per entry, kept in sync by triggers. The ADO triggers
+    # stand down while 'search_deferred' is set in app_meta, for bulk
+    # rewrites that refresh the column once per entry (_refresh_search).
+    has_search = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'entry_search'"
+    ).fetchone()
+    _run_script(conn, """
+        DROP TRIGGER IF EXISTS entry_search_ado_insert;
+        DROP TRIGGER IF EXISTS entry_search_ado_update;
+        DROP TRIGGER IF EXISTS entry_search_ado_delete;
+        CREATE VIRTUAL TABLE IF NOT EXISTS entry_search
+            USING fts5(description, notes, ado, tokenize='trigram');
+        CREATE TRIGGER IF NOT EXISTS entry_search_insert AFTER INSERT ON entries BEGIN
+            INSERT INTO entry_search (rowid, description, notes, ado) VALUES (
+                new.id, new.description, new.notes,
+                (SELECT group_concat(value, ' ') FROM entry_ado_items WHERE entry_id = new.id)
             );
-            CREATE INDEX IF NOT EXISTS idx_entry_ado_items_entry
-                ON entry_ado_items(entry_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS entry_search_delete AFTER DELETE ON entries BEGIN
+            DELETE FROM entry_search WHERE rowid = old.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS entry_search_update AFTER UPDATE OF description, notes ON entries BEGIN
+            UPDATE entry_search SET description = new.description, notes = new.notes
+            WHERE rowid = new.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS entry_search_ado_insert AFTER INSERT ON entry_ado_items
+        WHEN NOT EXISTS (SELECT 1 FROM app_meta WHERE key = 'search_deferred') BEGIN
+            UPDATE entry_search SET ado = (
+                SELECT group_concat(value, ' ') FROM entry_ado_items WHERE entry_id = new.entry_id
+            ) WHERE rowid = new.entry_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS entry_search_ado_update AFTER UPDATE ON entry_ado_items
+        WHEN NOT EXISTS (SELECT 1 FROM app_meta WHERE key = 'search_deferred') BEGIN
+            UPDATE entry_search SET ado = (
+                SELECT group_concat(value, ' ') FROM entry_ado_items WHERE entry_id = new.entry_id
+            ) WHERE rowid = new.entry_id;
+            UPDATE entry_search SET ado = (
+                SELECT group_concat(value, ' ') FROM entry_ado_items WHERE entry_id = old.entry_id
+            ) WHERE rowid = old.entry_id AND old.entry_id != new.entry_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS entry_search_ado_delete AFTER DELETE ON entry_ado_items
+        WHEN NOT EXISTS (SELECT 1 FROM app_meta WHERE key = 'search_deferred') BEGIN
+            UPDATE entry_search SET ado = (
+                SELECT group_concat(value, ' ') FROM entry_ado_items WHERE entry_id = old.entry_id
+            ) WHERE rowid = old.entry_id;
+        END;
+    """)
+    if not has_search:
+        conn.execute("""
+            INSERT INTO entry_search (rowid, description, notes, ado)
+            SELECT id, description, notes,
+                   (SELECT group_concat(value, ' ') FROM entry_ado_items WHERE entry_id = entries.id)
+            FROM entries
         """)
-        # Seed default link types if table is empty
-        has_types = conn.execute("SELECT COUNT(*) FROM ado_link_types").fetchone()[0]
-        if not has_types:
-            conn.execute("INSERT INTO ado_link_types (title, url_template, position) VALUES (?, ?, ?)",
-                         ("Work Item", "", 0))
-            conn.execute("INSERT INTO ado_link_types (title, url_template, position) VALUES (?, ?, ?)",
-                         ("Pull Request", "", 1))
-        # Migration: add sort_order column if missing
-        entry_cols2 = [r[1] for r in conn.execute("PRAGMA table_info(entries)").fetchall()]
-        if "sort_order" not in entry_cols2:
-            conn.execute("ALTER TABLE entries ADD COLUMN sort_order INTEGER")
-        # Migrate existing ado_workitem/ado_pr data to entry_ado_items
-        has_ado_items = conn.execute("SELECT COUNT(*) FROM entry_ado_items").fetchone()[0]
-        if not has_ado_items:
-            wi_type = conn.execute("SELECT id FROM ado_link_types WHERE title = 'Work Item'").fetchone()
-            pr_type = conn.execute("SELECT id FROM ado_link_types WHERE title = 'Pull Request'").fetchone()
-            if wi_type:
-                conn.execute("""
-                    INSERT INTO entry_ado_items (entry_id, link_type_id, value, position)
-                    SELECT id, ?, ado_workitem, 0 FROM entries WHERE ado_workitem != ''
-                """, (wi_type["id"],))
-            if pr_type:
-                conn.execute("""
-                    INSERT INTO entry_ado_items (entry_id, link_type_id, value, position)
-                    SELECT id, ?, ado_pr, 1 FROM entries WHERE ado_pr != ''
-                """, (pr_type["id"],))
-        conn.commit()
+
+
+def _migrate_rollups(conn):
+    """Daily rollups: per-day totals (account_id 0) and per-day, per-account totals."""
+    has_rollups = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'daily_rollups'"
+    ).fetchone()
+    _run_script(conn, """
+        CREATE TABLE IF NOT EXISTS daily_rollups (
+            date TEXT NOT NULL,
+            account_id INTEGER NOT NULL,
+            duration INTEGER NOT NULL,
+            imputed INTEGER NOT NULL,
+            entry_count INTEGER NOT NULL,
+            PRIMARY KEY (date, account_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_daily_rollups_account
+            ON daily_rollups(account_id, date, duration, imputed);
+    """)
+    if not has_rollups:
+        conn.execute(f"INSERT INTO daily_rollups {_ROLLUP_SELECT}")
+
+
+def _migrate_covering_indexes(conn):
+    """Indexes shaped after the hot queries: entries in display order within a
+    day, entries by group, and splits and ADO items by entry in position order
+    carrying every column, so hydrating reads no table rows and sorts nothing."""
+    _run_script(conn, """
+        CREATE INDEX IF NOT EXISTS idx_entries_group_id ON entries(group_id);
+        CREATE INDEX IF NOT EXISTS idx_entries_day_order
+            ON entries(date DESC, COALESCE(sort_order, id), id);
+        DROP INDEX IF EXISTS idx_entries_date;
+        CREATE INDEX IF NOT EXISTS idx_entry_imputations_entry_position
+            ON entry_imputations(entry_id, position, account_id, duration);
+        DROP INDEX IF EXISTS idx_entry_imputations_entry;
+        CREATE INDEX IF NOT EXISTS idx_entry_ado_items_entry_position
+            ON entry_ado_items(entry_id, position, link_type_id, value);
+        DROP INDEX IF EXISTS idx_entry_ado_items_entry;
+    """)
+
+
+MIGRATIONS = [
+    _migrate_base,
+    _migrate_splits,
+    _migrate_ado_items,
+    _migrate_sort_order,
+    _migrate_change_feed,
+    _migrate_undo_delta,
+    _migrate_suggest_indexes,
+    _migrate_search,
+    _migrate_rollups,
+    _migrate_covering_indexes,
+]
+
+
+def schema_version(db_path):
+    with get_connection(db_path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def init_db(db_path):
+    """Bring the schema up to date. An up-to-date database costs one PRAGMA read;
+    otherwise each pending migration runs and bumps user_version atomically."""
+    if schema_version(db_path) >= len(MIGRATIONS):
+        return
+    with get_connection(db_path, write=True) as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+            conn.execute("BEGIN IMMEDIATE")
+            step(conn)
+            if number == len(MIGRATIONS):
+                _touch(conn, *DATA_TABLES)  # migrations may rewrite any table
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
 
 
 # --- Undo/Redo infrastructure ---
@@ -149,108 +657,248 @@ ENTRY_COLUMNS = [
     "ado_workitem", "ado_pr", "imputation_account_id",
     "imputation_duration", "group_id", "sort_order",
 ]
+SPLIT_COLUMNS = ["id", "entry_id", "account_id", "duration", "position"]
+ADO_ITEM_COLUMNS = ["id", "entry_id", "link_type_id", "value", "position"]
 
 UNDO_STACK_LIMIT = 50
 
+# undo_log.format: 1 = full before/after snapshots in before_state/after_state,
+# 2 = per-entry differences as JSON in delta, 3 = the same, zlib-compressed.
+UNDO_FORMAT_SNAPSHOT = 1
+UNDO_FORMAT_DELTA = 2
+UNDO_FORMAT_DELTA_ZLIB = 3
+UNDO_COMPRESS_MIN_BYTES = 1024
+
+_CHILD_KEYS = ("_splits", "_ado_items")
+
 
 def _snapshot_entries(conn, entry_ids):
     if not entry_ids:
         return []
+    entry_ids = list(entry_ids)
     placeholders = ",".join("?" * len(entry_ids))
     rows = conn.execute(
-        f"SELECT * FROM entries WHERE id IN ({placeholders})", list(entry_ids)
+        f"SELECT * FROM entries WHERE id IN ({placeholders})", entry_ids
     ).fetchall()
+    splits_by_entry = {}
+    for s in conn.execute(
+        f"SELECT * FROM entry_imputations WHERE entry_id IN ({placeholders}) ORDER BY entry_id, position",
+        entry_ids,
+    ).fetchall():
+        splits_by_entry.setdefault(s["entry_id"], []).append(dict(s))
+    ado_by_entry = {}
+    for a in conn.execute(
+        f"SELECT * FROM entry_ado_items WHERE entry_id IN ({placeholders}) ORDER BY entry_id, position",
+        entry_ids,
+    ).fetchall():
+        ado_by_entry.setdefault(a["entry_id"], []).append(dict(a))
     result = []
     for r in rows:
         d = dict(r)
-        splits = conn.execute(
-            "SELECT * FROM entry_imputations WHERE entry_id = ? ORDER BY position",
-            (d["id"],),
-        ).fetchall()
-        d["_splits"] = [dict(s) for s in splits]
-        ado_items = conn.execute(
-            "SELECT * FROM entry_ado_items WHERE entry_id = ? ORDER BY position",
-            (d["id"],),
-        ).fetchall()
-        d["_ado_items"] = [dict(a) for a in ado_items]
+        d["_splits"] = splits_by_entry.get(d["id"], [])
+        d["_ado_items"] = ado_by_entry.get(d["id"], [])
         result.append(d)
     return result
 
 
+def _diff_children(before_rows, after_rows):
+    before = {r["id"]: r for r in before_rows}
+    after = {r["id"]: r for r in after_rows}
+    removed = [r for rid, r in before.items() if after.get(rid) != r]
+    added = [r for rid, r in after.items() if before.get(rid) != r]
+    return {"b": removed, "a": added} if removed or added else None
+
+
+def _diff_entries(before_entries, after_entries):
+    """Reduce two snapshots to what differs per entry.
+
+    Each record holds the entry id and, under "b" and "a", the before and after
+    values of the changed columns. A created or deleted entry is stored whole
+    on one side and None on the other. Child tables that changed get the same
+    "b"/"a" pair of differing rows under their snapshot key.
+    """
+    before = {e["id"]: e for e in before_entries}
+    after = {e["id"]: e for e in after_entries}
+    diff = []
+    for eid in sorted(before.keys() | after.keys()):
+        b, a = before.get(eid), after.get(eid)
+        if b == a:
+            continue
+        if b is None or a is None:
+            diff.append({"id": eid, "b": b, "a": a})
+            continue
+        cols = [c for c in a if c not in _CHILD_KEYS and b.get(c) != a[c]]
+        record = {"id": eid, "b": {c: b.get(c) for c in cols}, "a": {c: a[c] for c in cols}}
+        for key in _CHILD_KEYS:
+            children = _diff_children(b.get(key, []), a.get(key, []))
+            if children:
+                record[key] = children
+        diff.append(record)
+    return diff
+
+
+def _apply_diff(current_entries, diff, side):
+    """Rebuild the `side` ("b" or "a") snapshot of a diff from the entries as
+    they currently are, i.e. as they were left by the other side."""
+    other = "a" if side == "b" else "b"
+    current = {e["id"]: e for e in current_entries}
+    result = []
+    for record in diff:
+        target, source = record[side], record[other]
+        if target is None:
+            continue
+        if source is None:
+            result.append(target)
+            continue
+        entry = {**current[record["id"]], **target}
+        for key in _CHILD_KEYS:
+            if key in record:
+                drop = {r["id"] for r in record[key][other]}
+                rows = [r for r in entry.get(key, []) if r["id"] not in drop] + record[key][side]
+                entry[key] = sorted(rows, key=lambda r: (r["position"], r["id"]))
+        result.append(entry)
+    return result
+
+
 def _record_undo(conn, action_type, before_entries, after_entries):
-    if before_entries == after_entries:
+    diff = _diff_entries(before_entries, after_entries)
+    if not diff:
         return
-    conn.execute("DELETE FROM undo_log WHERE undone = 1")
+    # Every entry mutation ends up here, so this is where the change feed and
+    # the daily rollups are fed.
+    changed_ids = {d["id"] for d in diff}
+    _mark_changed(conn, changed_ids)
+    _apply_rollups(
+        conn,
+        [e for e in before_entries if e["id"] in changed_ids],
+        [e for e in after_entries if e["id"] in changed_ids],
+    )
+    payload = json.dumps(diff, separators=(",", ":")).encode()
+    fmt = UNDO_FORMAT_DELTA
+    if len(payload) >= UNDO_COMPRESS_MIN_BYTES:
+        payload, fmt = zlib.compress(payload), UNDO_FORMAT_DELTA_ZLIB
+    head, undo_depth, redo_depth = _undo_pointers(conn)
+    if redo_depth:
+        # Redo steps always sit above the head, so this is a primary-key range
+        conn.execute("DELETE FROM undo_log WHERE id > ?", (head,))
+    cur = conn.execute(
+        "INSERT INTO undo_log (action_type, before_state, after_state, format, delta) VALUES (?, '', '', ?, ?)",
+        (action_type, fmt, payload),
+    )
+    undo_depth += 1
+    if undo_depth > UNDO_STACK_LIMIT:
+        conn.execute(
+            "DELETE FROM undo_log WHERE id IN (SELECT id FROM undo_log ORDER BY id LIMIT ?)",
+            (undo_depth - UNDO_STACK_LIMIT,),
+        )
+        undo_depth = UNDO_STACK_LIMIT
+    _set_meta(conn, undo_head=cur.lastrowid, undo_depth=undo_depth, redo_depth=0)
+
+
+def _undo_states(conn, record):
+    """Return the (before, after) entry snapshots of an undo_log row."""
+    if record["format"] == UNDO_FORMAT_SNAPSHOT:
+        return json.loads(record["before_state"]), json.loads(record["after_state"])
+    payload = record["delta"]
+    if record["format"] == UNDO_FORMAT_DELTA_ZLIB:
+        payload = zlib.decompress(payload)
+    diff = json.loads(payload)
+    # The database currently sits on one side of the step; rebuild the other.
+    current = _snapshot_entries(conn, [d["id"] for d in diff])
+    if record["undone"]:
+        return current, _apply_diff(current, diff, "a")
+    return _apply_diff(current, diff, "b"), current
+
+
+def _restore_rows(conn, table, columns, key_column, key_ids, target):
+    """Make the rows of table whose key_column is in key_ids match target (id -> tuple).
+
+    Stale rows are deleted in one statement without being read; only rows the
+    target keeps are fetched and compared, and only differing ones are written.
+    """
+    ids_json = json.dumps(list(target))
     conn.execute(
-        "INSERT INTO undo_log (action_type, before_state, after_state) VALUES (?, ?, ?)",
-        (action_type, json.dumps(before_entries), json.dumps(after_entries)),
+        f"DELETE FROM {table} WHERE {key_column} IN (SELECT value FROM json_each(?)) "
+        f"AND id NOT IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(key_ids)), ids_json),
     )
+    cur = conn.cursor()
+    cur.row_factory = None
+    current = {row[0]: row for row in cur.execute(
+        f"SELECT {', '.join(columns)} FROM {table} WHERE id IN (SELECT value FROM json_each(?))", (ids_json,)
+    )}
+    insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    added = [vals for rid, vals in target.items() if rid not in current]
+    if added:
+        conn.executemany(insert, added)
+    changed = [vals for rid, vals in target.items() if rid in current and current[rid] != vals]
+    if changed:
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != "id")
+        conn.executemany(f"{insert} ON CONFLICT(id) DO UPDATE SET {updates}", changed)
+
+
+def _defer_search(conn):
+    """Suspend the per-row entry_search ADO triggers until _refresh_search."""
+    _set_meta(conn, search_deferred=1)
+
+
+def _refresh_search(conn, entry_ids):
+    """Recompute the ADO column of entry_search for entry_ids and resume the triggers."""
+    conn.execute("DELETE FROM app_meta WHERE key = 'search_deferred'")
     conn.execute("""
-        DELETE FROM undo_log WHERE id NOT IN (
-            SELECT id FROM undo_log ORDER BY id DESC LIMIT ?
-        )
-    """, (UNDO_STACK_LIMIT,))
+        UPDATE entry_search SET ado = (
+            SELECT group_concat(value, ' ') FROM entry_ado_items WHERE entry_id = entry_search.rowid
+        ) WHERE rowid IN (SELECT value FROM json_each(?))
+    """, (json.dumps(list(entry_ids)),))
 
 
 def _restore_entries(conn, target_state, all_entry_ids):
-    target_by_id = {e["id"]: e for e in target_state}
-    target_ids = set(target_by_id.keys())
-    all_ids = set(all_entry_ids)
-
-    # Delete entries that shouldn't exist in target state (CASCADE cleans splits)
-    to_delete = all_ids - target_ids
-    for eid in to_delete:
-        conn.execute("DELETE FROM entries WHERE id = ?", (eid,))
-
-    # Insert or update entries to match target state
-    for eid, edata in target_by_id.items():
-        existing = conn.execute("SELECT id FROM entries WHERE id = ?", (eid,)).fetchone()
-        if existing:
-            sets = ", ".join(f"{col} = ?" for col in ENTRY_COLUMNS if col != "id")
-            vals = [edata.get(col) for col in ENTRY_COLUMNS if col != "id"]
-            vals.append(eid)
-            conn.execute(f"UPDATE entries SET {sets} WHERE id = ?", vals)
-        else:
-            cols = ", ".join(ENTRY_COLUMNS)
-            placeholders = ", ".join("?" * len(ENTRY_COLUMNS))
-            vals = [edata.get(col) for col in ENTRY_COLUMNS]
-            conn.execute(f"INSERT INTO entries ({cols}) VALUES ({placeholders})", vals)
-
-        # Restore splits
-        conn.execute("DELETE FROM entry_imputations WHERE entry_id = ?", (eid,))
-        for s in edata.get("_splits", []):
-            conn.execute(
-                "INSERT INTO entry_imputations (id, entry_id, account_id, duration, position) VALUES (?, ?, ?, ?, ?)",
-                (s["id"], eid, s["account_id"], s["duration"], s["position"]),
-            )
-
-        # Restore ADO items (defaults to [] for old snapshots)
-        conn.execute("DELETE FROM entry_ado_items WHERE entry_id = ?", (eid,))
-        for a in edata.get("_ado_items", []):
-            conn.execute(
-                "INSERT INTO entry_ado_items (id, entry_id, link_type_id, value, position) VALUES (?, ?, ?, ?, ?)",
-                (a["id"], eid, a["link_type_id"], a["value"], a["position"]),
-            )
+    """Bring the entries in all_entry_ids to target_state, touching only rows that differ."""
+    _defer_search(conn)
+    # Entries missing from the target are deleted here; CASCADE cleans their children
+    _restore_rows(conn, "entries", ENTRY_COLUMNS, "id", all_entry_ids,
+                  {e["id"]: tuple(e.get(col) for col in ENTRY_COLUMNS) for e in target_state})
+
+    target_ids = [e["id"] for e in target_state]
+    for table, columns, key in (("entry_imputations", SPLIT_COLUMNS, "_splits"),
+                                ("entry_ado_items", ADO_ITEM_COLUMNS, "_ado_items")):
+        rows = {}
+        for e in target_state:
+            # Defaults to [] for snapshots taken before the child table existed
+            for row in e.get(key, []):
+                rows[row["id"]] = tuple(e["id"] if c == "entry_id" else row[c] for c in columns)
+        _restore_rows(conn, table, columns, "entry_id", target_ids, rows)
+    _refresh_search(conn, target_ids)
+
+
+def _undo_pointers(conn):
+    """Return (head, undo_depth, redo_depth): the id of the newest applied step
+    (0 if none) and how many steps can be undone and redone."""
+    meta = dict(conn.execute(
+        "SELECT key, value FROM app_meta WHERE key IN ('undo_head', 'undo_depth', 'redo_depth')"
+    ).fetchall())
+    return meta.get("undo_head", 0), meta.get("undo_depth", 0), meta.get("redo_depth", 0)
+
+
+def _undo_status(conn):
+    _, undo_depth, redo_depth = _undo_pointers(conn)
+    return {"can_undo": undo_depth > 0, "can_redo": redo_depth > 0}
 
 
 def undo_status(db_path):
     with get_connection(db_path) as conn:
-        can_undo = conn.execute("SELECT COUNT(*) FROM undo_log WHERE undone = 0").fetchone()[0] > 0
-        can_redo = conn.execute("SELECT COUNT(*) FROM undo_log WHERE undone = 1").fetchone()[0] > 0
-        return {"can_undo": can_undo, "can_redo": can_redo}
+        return _undo_status(conn)
 
 
 def perform_undo(db_path):
-    with get_connection(db_path) as conn:
-        row = conn.execute(
-            "SELECT * FROM undo_log WHERE undone = 0 ORDER BY id DESC LIMIT 1"
-        ).fetchone()
+    def job(conn):
+        head, undo_depth, redo_depth = _undo_pointers(conn)
+        row = conn.execute("SELECT * FROM undo_log WHERE id = ?", (head,)).fetchone() if undo_depth else None
         if not row:
             return {"ok": False, "reason": "nothing_to_undo"}
 
         record = dict(row)
-        before = json.loads(record["before_state"])
-        after = json.loads(record["after_state"])
+        before, after = _undo_states(conn, record)
 
         all_ids = set()
         for e in before:
@@ -259,22 +907,28 @@ def perform_undo(db_path):
             all_ids.add(e["id"])
 
         _restore_entries(conn, before, all_ids)
+        _mark_changed(conn, all_ids)
+        _apply_rollups(conn, after, before)
         conn.execute("UPDATE undo_log SET undone = 1 WHERE id = ?", (record["id"],))
+        new_head = conn.execute("SELECT COALESCE(MAX(id), 0) FROM undo_log WHERE id < ?", (head,)).fetchone()[0]
+        _set_meta(conn, undo_head=new_head, undo_depth=undo_depth - 1, redo_depth=redo_depth + 1)
         conn.commit()
-        return {"ok": True, "action_type": record["action_type"]}
+        return {"ok": True, "action_type": record["action_type"], **_delta(conn, after, before)}
+
+    return _submit(db_path, job)
 
 
 def perform_redo(db_path):
-    with get_connection(db_path) as conn:
+    def job(conn):
+        head, undo_depth, redo_depth = _undo_pointers(conn)
         row = conn.execute(
-            "SELECT * FROM undo_log WHERE undone = 1 ORDER BY id ASC LIMIT 1"
-        ).fetchone()
+            "SELECT * FROM undo_log WHERE id > ? ORDER BY id LIMIT 1", (head,)
+        ).fetchone() if redo_depth else None
         if not row:
             return {"ok": False, "reason": "nothing_to_redo"}
 
         record = dict(row)
-        before = json.loads(record["before_state"])
-        after = json.loads(record["after_state"])
+        before, after = _undo_states(conn, record)
 
         all_ids = set()
         for e in before:
@@ -283,42 +937,249 @@ def perform_redo(db_path):
             all_ids.add(e["id"])
 
         _restore_entries(conn, after, all_ids)
+        _mark_changed(conn, all_ids)
+        _apply_rollups(conn, before, after)
         conn.execute("UPDATE undo_log SET undone = 0 WHERE id = ?", (record["id"],))
+        _set_meta(conn, undo_head=record["id"], undo_depth=undo_depth + 1, redo_depth=redo_depth - 1)
         conn.commit()
-        return {"ok": True, "action_type": record["action_type"]}
+        return {"ok": True, "action_type": record["action_type"], **_delta(conn, before, after)}
+
+    return _submit(db_path, job)
+
+
+# --- Change feed ---
+
+def _set_meta(conn, **values):
+    conn.executemany(
+        "INSERT INTO app_meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        list(values.items()),
+    )
+
+
+def _current_version(conn):
+    row = conn.execute("SELECT value FROM app_meta WHERE key = 'change_version'").fetchone()
+    return row[0] if row else 0
+
+
+def _mark_changed(conn, entry_ids):
+    """Bump the change version and stamp it on every entry in entry_ids."""
+    if not entry_ids:
+        return _current_version(conn)
+    _touch(conn, "entries")
+    conn.execute("""
+        INSERT INTO app_meta (key, value) VALUES ('change_version', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    """)
+    version = _current_version(conn)
+    _evict_entries(conn.db_path, entry_ids)
+    conn.executemany("""
+        INSERT INTO entry_versions (entry_id, version) VALUES (?, ?)
+        ON CONFLICT(entry_id) DO UPDATE SET version = excluded.version
+    """, [(eid, version) for eid in entry_ids])
+    return version
+
+
+def change_version(db_path):
+    with get_connection(db_path) as conn:
+        return _current_version(conn)
+
+
+def list_changes(db_path, since):
+    """Return entries created or changed, and IDs deleted, after version `since`."""
+    with get_connection(db_path) as conn:
+        conn.execute("BEGIN")  # one read snapshot for the version and the rows
+        version = _current_version(conn)
+        rows = conn.execute(_ENTRY_QUERY + """
+            WHERE id IN (SELECT entry_id FROM entry_versions WHERE version > ?)
+            ORDER BY date DESC, COALESCE(sort_order, id), id
+        """, (since,)).fetchall()
+        entries = _hydrate(conn, rows)
+        deleted = [r[0] for r in conn.execute("""
+            SELECT entry_id FROM entry_versions
+            WHERE version > ? AND entry_id NOT IN (SELECT id FROM entries)
+        """, (since,)).fetchall()]
+        return {"version": version, "entries": entries, "deleted": deleted, "total": _history_total(conn)}
+
+
+# --- Daily rollups ---
+
+# What daily_rollups should hold, computed from the raw rows. Account 0 is the
+# whole day; an account row counts every entry with a split on that account,
+# with the entry's full duration and the account's share as imputed.
+_ROLLUP_SELECT = """
+    SELECT date, 0, SUM(duration),
+           SUM(COALESCE((SELECT SUM(duration) FROM entry_imputations WHERE entry_id = e.id), 0)),
+           COUNT(*)
+    FROM entries e GROUP BY date
+    UNION ALL
+    SELECT e.date, s.account_id, SUM(e.duration), SUM(s.imputed), COUNT(*)
+    FROM entries e
+    JOIN (SELECT entry_id, account_id, SUM(duration) AS imputed
+          FROM entry_imputations GROUP BY entry_id, account_id) s ON s.entry_id = e.id
+    GROUP BY e.date, s.account_id
+"""
+
+
+def _rollup_deltas(entries, sign, acc):
+    for e in entries:
+        per_account = {}
+        for s in e.get("_splits", []):
+            per_account[s["account_id"]] = per_account.get(s["account_id"], 0) + s["duration"]
+        rows = [(0, sum(per_account.values()))] + list(per_account.items())
+        for account_id, imputed in rows:
+            totals = acc.setdefault((e["date"], account_id), [0, 0, 0])
+            totals[0] += sign * e["duration"]
+            totals[1] += sign * imputed
+            totals[2] += sign
+
+
+def _apply_rollups(conn, before_entries, after_entries):
+    """Move daily_rollups from the before snapshot of some entries to their after snapshot."""
+    acc = {}
+    _rollup_deltas(before_entries, -1, acc)
+    _rollup_deltas(after_entries, 1, acc)
+    rows = [(date, account_id, *totals) for (date, account_id), totals in acc.items() if any(totals)]
+    if not rows:
+        return
+    conn.executemany("""
+        INSERT INTO daily_rollups (date, account_id, duration, imputed, entry_count) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(date, account_id) DO UPDATE SET
+            duration = duration + excluded.duration,
+            imputed = imputed + excluded.imputed,
+            entry_count = entry_count + excluded.entry_count
+    """, rows)
+    conn.executemany(
+        "DELETE FROM daily_rollups WHERE date = ? AND account_id = ? AND entry_count = 0",
+        [r[:2] for r in rows],
+    )
+
+
+def _history_total(conn):
+    return conn.execute(
+        "SELECT COALESCE(SUM(duration), 0) FROM daily_rollups WHERE account_id = 0"
+    ).fetchone()[0]
+
+
+def check_rollups(db_path, repair=False):
+    """Compare daily_rollups with the raw rows; with repair, rebuild it if they differ.
+
+    Returns {"ok", "mismatches", "repaired"} where mismatches counts rows that
+    are missing, stale or extra.
+    """
+    with get_connection(db_path, write=repair) as conn:
+        stored = "SELECT date, account_id, duration, imputed, entry_count FROM daily_rollups"
+        expected = f"SELECT * FROM ({_ROLLUP_SELECT})"
+        mismatches = conn.execute(f"""
+            SELECT (SELECT COUNT(*) FROM ({expected} EXCEPT {stored}))
+                 + (SELECT COUNT(*) FROM ({stored} EXCEPT {expected}))
+        """).fetchone()[0]
+        repaired = False
+        if mismatches and repair:
+            conn.execute("DELETE FROM daily_rollups")
+            conn.execute(f"INSERT INTO daily_rollups {_ROLLUP_SELECT}")
+            conn.commit()
+            repaired = True
+        return {"ok": mismatches == 0, "mismatches": mismatches, "repaired": repaired}
+
+
+def _get_entries(conn, entry_ids):
+    """Fetch and hydrate the given entries in display order."""
+    if not entry_ids:
+        return []
+    placeholders = ",".join("?" * len(entry_ids))
+    rows = conn.execute(
+        _ENTRY_QUERY + f" WHERE id IN ({placeholders}) ORDER BY date DESC, COALESCE(sort_order, id), id",
+        list(entry_ids),
+    ).fetchall()
+    return _hydrate(conn, rows)
+
+
+def _delta(conn, before_entries, after_entries):
+    """Describe a mutation for the client: every surviving affected entry, fully
+    hydrated, the IDs that no longer exist, the change version it produced and
+    the resulting undo/redo availability."""
+    after_ids = [e["id"] for e in after_entries]
+    deleted = sorted({e["id"] for e in before_entries} - set(after_ids))
+    return {
+        "changed": _get_entries(conn, after_ids),
+        "deleted": deleted,
+        "version": _current_version(conn),
+        "undo": _undo_status(conn),
+        "total": _history_total(conn),
+    }
+
+
+def _with_entry(delta, entry_id):
+    """Add the entry that was acted on to a delta under the "entry" key."""
+    delta["entry"] = next((e for e in delta["changed"] if e["id"] == entry_id), None)
+    return delta
+
+
+def _commit_change(conn, action_type, before, after):
+    """Record the undo step for a mutation, commit it and return its delta."""
+    _record_undo(conn, action_type, before, after)
+    conn.commit()
+    return _delta(conn, before, after)
+
+
+# --- Reference data cache ---
+
+# Accounts and link types are tiny and rarely written, so they are kept in
+# memory per database and reloaded whenever their data version moves.
+_REFERENCE_QUERIES = {
+    "accounts": "SELECT * FROM imputation_accounts ORDER BY number",
+    "link_types": "SELECT * FROM ado_link_types ORDER BY position, id",
+}
+_reference_cache = {}
+
+
+def _reference(conn, table, version=None):
+    """Return {id: row dict} for a reference table, in listing order.
+
+    version is the table's data version as of conn's snapshot; it is read
+    here when not given. Reads inside a writer job are not cached, as they may
+    see writes (and a version bump) that end up rolled back.
+    """
+    key = (conn.db_path, table)
+    if version is None:
+        (version,) = _data_versions(conn, (table,))
+    cached = _reference_cache.get(key)
+    if cached is None or cached[0] != version:
+        rows = conn.execute(_REFERENCE_QUERIES[table]).fetchall()
+        cached = (version, {r["id"]: dict(r) for r in rows})
+        if not getattr(conn, "uncommitted", False):
+            _reference_cache[key] = cached
+    return cached[1]
 
 
 # --- Imputation accounts ---
 
 def list_accounts(db_path, include_inactive=False):
     with get_connection(db_path) as conn:
-        if include_inactive:
-            rows = conn.execute(
-                "SELECT * FROM imputation_accounts ORDER BY number"
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT * FROM imputation_accounts WHERE active = 1 ORDER BY number"
-            ).fetchall()
-        return [dict(r) for r in rows]
+        conn.execute("BEGIN")  # one read snapshot for the version and the rows
+        accounts = _reference(conn, "accounts").values()
+        return [dict(a) for a in accounts if include_inactive or a["active"] == 1]
 
 
 def create_account(db_path, number, description="", project="", open_date=None, close_date=None):
-    with get_connection(db_path) as conn:
+    def job(conn):
         cur = conn.execute(
             "INSERT INTO imputation_accounts (number, description, project, open_date, close_date) VALUES (?, ?, ?, ?, ?)",
             (number, description, project, open_date, close_date),
         )
         account_id = cur.lastrowid
+        _touch(conn, "accounts")
         conn.commit()
         row = conn.execute(
             "SELECT * FROM imputation_accounts WHERE id = ?", (account_id,)
         ).fetchone()
         return dict(row)
 
+    return _submit(db_path, job)
+
 
 def update_account(db_path, account_id, **fields):
-    with get_connection(db_path) as conn:
+    def job(conn):
         allowed = {"number", "description", "project", "open_date", "close_date", "active"}
         updates = {k: v for k, v in fields.items() if k in allowed}
         if not updates:
@@ -328,46 +1189,61 @@ def update_account(db_path, account_id, **fields):
         conn.execute(
             f"UPDATE imputation_accounts SET {set_clause} WHERE id = ?", values
         )
+        _touch(conn, "accounts")
         conn.commit()
         row = conn.execute(
             "SELECT * FROM imputation_accounts WHERE id = ?", (account_id,)
         ).fetchone()
         return dict(row) if row else None
 
+    return _submit(db_path, job)
+
 
 def delete_account(db_path, account_id):
-    with get_connection(db_path) as conn:
+    def job(conn):
         conn.execute(
             "UPDATE imputation_accounts SET active = 0 WHERE id = ?", (account_id,)
         )
+        _touch(conn, "accounts")
         conn.commit()
 
+    return _submit(db_path, job)
+
 
 # --- Entries ---
 
-_ENTRY_QUERY = "SELECT * FROM entries"
+# Entry rows plus their change version, for _hydrate
+_ENTRY_QUERY = """
+    SELECT entries.*, COALESCE(v.version, 0) AS _version
+    FROM entries LEFT JOIN entry_versions v ON v.entry_id = entries.id
+"""
+
+# Stand-ins for a missing account or link type, as a LEFT JOIN would give
+_NO_ACCOUNT = dict.fromkeys(["number", "description", "project", "open_date", "close_date"])
+_NO_LINK_TYPE = dict.fromkeys(["title", "url_template"])
 
 
-def _attach_splits(conn, entries):
+def _attach_splits(conn, entries, accounts_version=None):
     """Attach splits with account details to a list of entry dicts."""
     if not entries:
         return entries
     entry_ids = [e["id"] for e in entries]
     placeholders = ",".join("?" * len(entry_ids))
     rows = conn.execute(f"""
-        SELECT ei.*, a.number AS account_number,
-               a.description AS account_description,
-               a.project AS account_project,
-               a.open_date AS account_open_date,
-               a.close_date AS account_close_date
-        FROM entry_imputations ei
-        LEFT JOIN imputation_accounts a ON ei.account_id = a.id
-        WHERE ei.entry_id IN ({placeholders})
-        ORDER BY ei.entry_id, ei.position
+        SELECT * FROM entry_imputations
+        WHERE entry_id IN ({placeholders})
+        ORDER BY entry_id, position
     """, entry_ids).fetchall()
+    accounts = _reference(conn, "accounts", accounts_version)
     splits_by_entry = {}
     for r in rows:
         d = dict(r)
+        a = accounts.get(d["account_id"], _NO_ACCOUNT)
+        d["account_number"] = a["number"]
+        d["account_description"] = a["description"]
+        d["account_project"] = a["project"]
+        d["account_open_date"] = a["open_date"]
+        d["account_close_date"] = a["close_date"]
         eid = d["entry_id"]
         if eid not in splits_by_entry:
             splits_by_entry[eid] = []
@@ -377,23 +1253,24 @@ def _attach_splits(conn, entries):
     return entries
 
 
-def _attach_ado_items(conn, entries):
+def _attach_ado_items(conn, entries, link_types_version=None):
     """Attach ADO items with link type details to a list of entry dicts."""
     if not entries:
         return entries
     entry_ids = [e["id"] for e in entries]
     placeholders = ",".join("?" * len(entry_ids))
     rows = conn.execute(f"""
-        SELECT ai.*, lt.title AS link_type_title,
-               lt.url_template AS link_type_url_template
-        FROM entry_ado_items ai
-        LEFT JOIN ado_link_types lt ON ai.link_type_id = lt.id
-        WHERE ai.entry_id IN ({placeholders})
-        ORDER BY ai.entry_id, ai.position
+        SELECT * FROM entry_ado_items
+        WHERE entry_id IN ({placeholders})
+        ORDER BY entry_id, position
     """, entry_ids).fetchall()
+    link_types = _reference(conn, "link_types", link_types_version)
     items_by_entry = {}
     for r in rows:
         d = dict(r)
+        lt = link_types.get(d["link_type_id"], _NO_LINK_TYPE)
+        d["link_type_title"] = lt["title"]
+        d["link_type_url_template"] = lt["url_template"]
         eid = d["entry_id"]
         if eid not in items_by_entry:
             items_by_entry[eid] = []
@@ -403,279 +1280,448 @@ def _attach_ado_items(conn, entries):
     return entries
 
 
+# --- Hydrated entry cache ---
+
+# Fully hydrated entries, most recently used last, keyed by (db_path, id) and
+# valid for one entry version and one version of accounts and link types.
+# Cached dicts are shared between callers and must be treated as read-only.
+ENTRY_CACHE_SIZE = 20000
+_entry_cache = OrderedDict()
+_entry_cache_lock = threading.Lock()
+_entry_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+
+def _trim_entry_cache():
+    with _entry_cache_lock:
+        while len(_entry_cache) > ENTRY_CACHE_SIZE:
+            _entry_cache.popitem(last=False)
+            _entry_cache_stats["evictions"] += 1
+
+
+def _evict_entries(db_path, entry_ids):
+    with _entry_cache_lock:
+        for entry_id in entry_ids:
+            if _entry_cache.pop((db_path, entry_id), None) is not None:
+                _entry_cache_stats["invalidations"] += 1
+
+
+def _hydrate(conn, rows):
+    """Turn rows from _ENTRY_QUERY into entry dicts with splits and ADO items,
+    reusing cached entries whose versions still match.
+
+    The rows and the child rows read here must come from one snapshot: call
+    it inside a read transaction or from a writer job. Entries read inside a
+    job are not cached, as its group may still fail to commit. The reference
+    versions come from the same snapshot and are handed down to _reference,
+    so a cached entry never pairs old account or link type details with new
+    versions.
+    """
+    refs = _data_versions(conn, ("accounts", "link_types"))
+    entries = []
+    misses = []
+    with _entry_cache_lock:
+        for r in rows:
+            key = (conn.db_path, r["id"])
+            cached = _entry_cache.get(key)
+            if cached is not None and cached[0] == r["_version"] and cached[1] == refs:
+                _entry_cache.move_to_end(key)
+                entries.append(cached[2])
+            else:
+                entry = dict(r)
+                misses.append((entry.pop("_version"), entry))
+                entries.append(entry)
+        _entry_cache_stats["hits"] += len(entries) - len(misses)
+        _entry_cache_stats["misses"] += len(misses)
+    if misses:
+        hydrated = [entry for _, entry in misses]
+        _attach_splits(conn, hydrated, refs[0])
+        _attach_ado_items(conn, hydrated, refs[1])
+        if not getattr(conn, "uncommitted", False):
+            with _entry_cache_lock:
+                for version, entry in misses:
+                    _entry_cache[(conn.db_path, entry["id"])] = (version, refs, entry)
+            _trim_entry_cache()
+    return entries
+
+
+def _deep_size(obj):
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(v) for v in obj.values())
+    elif isinstance(obj, list):
+        size += sum(_deep_size(v) for v in obj)
+    return size
+
+
+def entry_cache_stats():
+    """Return the hydrated-entry cache counters, hit rate and approximate size."""
+    with _entry_cache_lock:
+        stats = dict(_entry_cache_stats)
+        items = list(_entry_cache.values())
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else None
+    stats["entries"] = len(items)
+    stats["max_entries"] = ENTRY_CACHE_SIZE
+    # Keys are shared with the entry dicts, so only values are counted
+    stats["approx_bytes"] = sum(_deep_size(entry) for _, _, entry in items)
+    return stats
+
+
+# --- Entry listing ---
+
 def list_entries(db_path, date_from=None, date_to=None):
     with get_connection(db_path) as conn:
-        if date_from and date_to:
-            rows = conn.execute(
-                _ENTRY_QUERY + " WHERE date >= ? AND date <= ? ORDER BY date DESC, COALESCE(sort_order, id), id",
-                (date_from, date_to),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                _ENTRY_QUERY + " ORDER BY date DESC, COALESCE(sort_order, id), id"
-            ).fetchall()
-        entries = [dict(r) for r in rows]
-        _attach_splits(conn, entries)
-        _attach_ado_items(conn, entries)
+        conn.execute("BEGIN")  # one read snapshot for the rows and their children
+        clauses = []
+        params = []
+        if date_from:
+            clauses.append("date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("date <= ?")
+            params.append(date_to)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        rows = conn.execute(
+            _ENTRY_QUERY + where + " ORDER BY date DESC, COALESCE(sort_order, id), id",
+            params,
+        ).fetchall()
+        entries = _hydrate(conn, rows)
         return entries
 
 
-def create_entry(db_path, data):
+def get_entries(db_path, entry_ids):
+    """Return the given entries, hydrated, in display order."""
     with get_connection(db_path) as conn:
-        splits_data = data.get("splits")
-        ado_items_data = data.get("ado_items")
-        cur = conn.execute(
-            """INSERT INTO entries
-               (date, duration, description, notes, ado_workitem, ado_pr)
-               VALUES (?, ?, ?, ?, ?, ?)""",
-            (
-                data["date"],
-                data["duration"],
-                data.get("description", ""),
-                data.get("notes", ""),
-                data.get("ado_workitem", ""),
-                data.get("ado_pr", ""),
-            ),
-        )
-        entry_id = cur.lastrowid
-        if splits_data:
-            for i, s in enumerate(splits_data):
-                conn.execute(
-                    "INSERT INTO entry_imputations (entry_id, account_id, duration, position) VALUES (?, ?, ?, ?)",
-                    (entry_id, s["account_id"], s["duration"], i),
-                )
-        if ado_items_data:
-            for i, a in enumerate(ado_items_data):
-                conn.execute(
-                    "INSERT INTO entry_ado_items (entry_id, link_type_id, value, position) VALUES (?, ?, ?, ?)",
-                    (entry_id, a["link_type_id"], a["value"], i),
-                )
-        after = _snapshot_entries(conn, [entry_id])
-        _record_undo(conn, "create_entry", [], after)
-        conn.commit()
-        row = conn.execute(_ENTRY_QUERY + " WHERE id = ?", (entry_id,)).fetchone()
-        entry = dict(row)
-        _attach_splits(conn, [entry])
-        _attach_ado_items(conn, [entry])
-        return entry
+        conn.execute("BEGIN")  # one read snapshot for the rows and their children
+        return _get_entries(conn, entry_ids)
 
 
-def update_entry(db_path, entry_id, data):
+def _encode_cursor(entry):
+    sort_key = entry["sort_order"] if entry["sort_order"] is not None else entry["id"]
+    return f"{entry['date']}|{sort_key}|{entry['id']}"
+
+
+def _decode_cursor(cursor):
+    date, sort_key, entry_id = cursor.split("|")
+    return date, int(sort_key), int(entry_id)
+
+
+def list_entries_page(db_path, days=30, cursor=None):
+    """Return up to `days` days of entries, newest first, resuming after `cursor`.
+
+    The cursor is the (date, sort key, id) of the last entry of the previous
+    page, so pages stay stable while entries are added to other days.
+    """
     with get_connection(db_path) as conn:
-        splits_data = data.pop("splits", None)
-        ado_items_data = data.pop("ado_items", None)
-        allowed = {
-            "date", "duration", "description", "notes", "group_id",
+        conn.execute("BEGIN")  # one read snapshot for the version and the rows
+        version = _current_version(conn)
+        where = "1"
+        params = []
+        if cursor:
+            c_date, c_sort, c_id = _decode_cursor(cursor)
+            where = """date <= ? AND (date < ? OR COALESCE(sort_order, id) > ?
+                       OR (COALESCE(sort_order, id) = ? AND id > ?))"""
+            params = [c_date, c_date, c_sort, c_sort, c_id]
+        dates = [r[0] for r in conn.execute(
+            f"SELECT DISTINCT date FROM entries WHERE {where} ORDER BY date DESC LIMIT ?",
+            params + [days + 1],
+        ).fetchall()]
+        if not dates:
+            return {"entries": [], "next_cursor": None, "version": version, "total": _history_total(conn)}
+        has_more = len(dates) > days
+        dates = dates[:days]
+        rows = conn.execute(
+            _ENTRY_QUERY + f" WHERE {where} AND date >= ? ORDER BY date DESC, COALESCE(sort_order, id), id",
+            params + [dates[-1]],
+        ).fetchall()
+        entries = _hydrate(conn, rows)
+        next_cursor = _encode_cursor(entries[-1]) if has_more else None
+        return {
+            "entries": entries,
+            "next_cursor": next_cursor,
+            "version": version,
+            "total": _history_total(conn),
         }
-        updates = {k: v for k, v in data.items() if k in allowed}
 
-        row = conn.execute("SELECT group_id FROM entries WHERE id = ?", (entry_id,)).fetchone()
-        if not row:
-            return None
-        group_id = row["group_id"]
-        shared_updates = {k: v for k, v in updates.items() if k in SHARED_FIELDS}
 
-        # Determine affected entries
-        affected_ids = {entry_id}
-        if group_id and (shared_updates or ado_items_data is not None):
-            group_rows = conn.execute("SELECT id FROM entries WHERE group_id = ?", (group_id,)).fetchall()
-            affected_ids = {r["id"] for r in group_rows}
+def _create_entry(conn, data):
+    splits_data = data.get("splits")
+    ado_items_data = data.get("ado_items")
+    cur = conn.execute(
+        """INSERT INTO entries
+           (date, duration, description, notes, ado_workitem, ado_pr)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        (
+            data["date"],
+            data["duration"],
+            data.get("description", ""),
+            data.get("notes", ""),
+            data.get("ado_workitem", ""),
+            data.get("ado_pr", ""),
+        ),
+    )
+    entry_id = cur.lastrowid
+    if splits_data:
+        for i, s in enumerate(splits_data):
+            conn.execute(
+                "INSERT INTO entry_imputations (entry_id, account_id, duration, position) VALUES (?, ?, ?, ?)",
+                (entry_id, s["account_id"], s["duration"], i),
+            )
+    if ado_items_data:
+        for i, a in enumerate(ado_items_data):
+            conn.execute(
+                "INSERT INTO entry_ado_items (entry_id, link_type_id, value, position) VALUES (?, ?, ?, ?)",
+                (entry_id, a["link_type_id"], a["value"], i),
+            )
+    after = _snapshot_entries(conn, [entry_id])
+    return entry_id, [], after
 
-        if not updates and splits_data is None and ado_items_data is None:
-            return None
 
-        # Snapshot BEFORE
-        before = _snapshot_entries(conn, list(affected_ids))
-
-        # Update scalar fields on the target entry
-        if updates:
-            set_clause = ", ".join(f"{k} = ?" for k in updates)
-            values = list(updates.values()) + [entry_id]
-            conn.execute(f"UPDATE entries SET {set_clause} WHERE id = ?", values)
-
-        # Propagate shared fields to group members
-        if group_id and shared_updates:
-            set_clause2 = ", ".join(f"{k} = ?" for k in shared_updates)
-            values2 = list(shared_updates.values()) + [group_id]
-            conn.execute(f"UPDATE entries SET {set_clause2} WHERE group_id = ?", values2)
-
-        # Update splits (per-entry only, not propagated to group)
-        if splits_data is not None:
-            conn.execute("DELETE FROM entry_imputations WHERE entry_id = ?", (entry_id,))
-            for i, s in enumerate(splits_data):
+def create_entry(db_path, data):
+    def job(conn):
+        entry_id, before, after = _create_entry(conn, data)
+        return _with_entry(_commit_change(conn, "create_entry", before, after), entry_id)
+
+    return _submit(db_path, job)
+
+
+def _update_entry(conn, entry_id, data):
+    splits_data = data.pop("splits", None)
+    ado_items_data = data.pop("ado_items", None)
+    allowed = {
+        "date", "duration", "description", "notes", "group_id",
+    }
+    updates = {k: v for k, v in data.items() if k in allowed}
+
+    row = conn.execute("SELECT group_id FROM entries WHERE id = ?", (entry_id,)).fetchone()
+    if not row:
+        return None
+    group_id = row["group_id"]
+    shared_updates = {k: v for k, v in updates.items() if k in SHARED_FIELDS}
+
+    # Determine affected entries
+    affected_ids = {entry_id}
+    if group_id and (shared_updates or ado_items_data is not None):
+        group_rows = conn.execute("SELECT id FROM entries WHERE group_id = ?", (group_id,)).fetchall()
+        affected_ids = {r["id"] for r in group_rows}
+
+    if not updates and splits_data is None and ado_items_data is None:
+        return None
+
+    # Snapshot BEFORE
+    before = _snapshot_entries(conn, list(affected_ids))
+
+    # Update scalar fields on the target entry
+    if updates:
+        set_clause = ", ".join(f"{k} = ?" for k in updates)
+        values = list(updates.values()) + [entry_id]
+        conn.execute(f"UPDATE entries SET {set_clause} WHERE id = ?", values)
+
+    # Propagate shared fields to group members
+    if group_id and shared_updates:
+        set_clause2 = ", ".join(f"{k} = ?" for k in shared_updates)
+        values2 = list(shared_updates.values()) + [group_id]
+        conn.execute(f"UPDATE entries SET {set_clause2} WHERE group_id = ?", values2)
+
+    # Update splits (per-entry only, not propagated to group)
+    if splits_data is not None:
+        conn.execute("DELETE FROM entry_imputations WHERE entry_id = ?", (entry_id,))
+        for i, s in enumerate(splits_data):
+            conn.execute(
+                "INSERT INTO entry_imputations (entry_id, account_id, duration, position) VALUES (?, ?, ?, ?)",
+                (entry_id, s["account_id"], s["duration"], i),
+            )
+
+    # Update ADO items (propagated to all group members)
+    if ado_items_data is not None:
+        for aid in affected_ids:
+            conn.execute("DELETE FROM entry_ado_items WHERE entry_id = ?", (aid,))
+            for i, a in enumerate(ado_items_data):
                 conn.execute(
-                    "INSERT INTO entry_imputations (entry_id, account_id, duration, position) VALUES (?, ?, ?, ?)",
-                    (entry_id, s["account_id"], s["duration"], i),
+                    "INSERT INTO entry_ado_items (entry_id, link_type_id, value, position) VALUES (?, ?, ?, ?)",
+                    (aid, a["link_type_id"], a["value"], i),
                 )
 
-        # Update ADO items (propagated to all group members)
-        if ado_items_data is not None:
-            for aid in affected_ids:
-                conn.execute("DELETE FROM entry_ado_items WHERE entry_id = ?", (aid,))
-                for i, a in enumerate(ado_items_data):
-                    conn.execute(
-                        "INSERT INTO entry_ado_items (entry_id, link_type_id, value, position) VALUES (?, ?, ?, ?)",
-                        (aid, a["link_type_id"], a["value"], i),
-                    )
-
-        # Snapshot AFTER
-        after = _snapshot_entries(conn, list(affected_ids))
-        _record_undo(conn, "update_entry", before, after)
-        conn.commit()
+    # Snapshot AFTER
+    after = _snapshot_entries(conn, list(affected_ids))
+    return entry_id, before, after
 
-        row = conn.execute(_ENTRY_QUERY + " WHERE id = ?", (entry_id,)).fetchone()
-        if not row:
+
+def update_entry(db_path, entry_id, data):
+    def job(conn):
+        change = _update_entry(conn, entry_id, data)
+        if change is None:
             return None
-        entry = dict(row)
-        _attach_splits(conn, [entry])
-        _attach_ado_items(conn, [entry])
-        return entry
+        _, before, after = change
+        return _with_entry(_commit_change(conn, "update_entry", before, after), entry_id)
+
+    return _submit(db_path, job)
+
+
+def _duplicate_entry(conn, entry_id, target_date, link=False):
+    row = conn.execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
+    if not row:
+        return None
+    src = dict(row)
+
+    # Before snapshot: source entry if link will modify it
+    before_ids = []
+    if link and not src["group_id"]:
+        before_ids = [entry_id]
+    before = _snapshot_entries(conn, before_ids)
+
+    group_id = None
+    if link:
+        if src["group_id"]:
+            group_id = src["group_id"]
+        else:
+            group_id = str(uuid.uuid4())
+            conn.execute("UPDATE entries SET group_id = ? WHERE id = ?", (group_id, entry_id))
+    cur = conn.execute(
+        """INSERT INTO entries
+           (date, duration, description, notes, ado_workitem, ado_pr, group_id)
+           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        (
+            target_date,
+            src["duration"],
+            src["description"],
+            src["notes"],
+            src["ado_workitem"],
+            src["ado_pr"],
+            group_id,
+        ),
+    )
+    new_id = cur.lastrowid
+
+    # Copy splits from source
+    src_splits = conn.execute(
+        "SELECT * FROM entry_imputations WHERE entry_id = ? ORDER BY position",
+        (entry_id,),
+    ).fetchall()
+    for s in src_splits:
+        conn.execute(
+            "INSERT INTO entry_imputations (entry_id, account_id, duration, position) VALUES (?, ?, ?, ?)",
+            (new_id, s["account_id"], s["duration"], s["position"]),
+        )
+
+    # Copy ADO items from source
+    src_ado_items = conn.execute(
+        "SELECT * FROM entry_ado_items WHERE entry_id = ? ORDER BY position",
+        (entry_id,),
+    ).fetchall()
+    for a in src_ado_items:
+        conn.execute(
+            "INSERT INTO entry_ado_items (entry_id, link_type_id, value, position) VALUES (?, ?, ?, ?)",
+            (new_id, a["link_type_id"], a["value"], a["position"]),
+        )
+
+    # After snapshot: new entry + source if modified
+    after_ids = [new_id]
+    if link and not src["group_id"]:
+        after_ids.append(entry_id)
+    after = _snapshot_entries(conn, after_ids)
+    return new_id, before, after
 
 
 def duplicate_entry(db_path, entry_id, target_date, link=False):
-    with get_connection(db_path) as conn:
-        row = conn.execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
-        if not row:
+    def job(conn):
+        change = _duplicate_entry(conn, entry_id, target_date, link=link)
+        if change is None:
             return None
-        src = dict(row)
-
-        # Before snapshot: source entry if link will modify it
-        before_ids = []
-        if link and not src["group_id"]:
-            before_ids = [entry_id]
-        before = _snapshot_entries(conn, before_ids)
-
-        group_id = None
-        if link:
-            if src["group_id"]:
-                group_id = src["group_id"]
-            else:
-                group_id = str(uuid.uuid4())
-                conn.execute("UPDATE entries SET group_id = ? WHERE id = ?", (group_id, entry_id))
-        cur = conn.execute(
-            """INSERT INTO entries
-               (date, duration, description, notes, ado_workitem, ado_pr, group_id)
-               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            (
-                target_date,
-                src["duration"],
-                src["description"],
-                src["notes"],
-                src["ado_workitem"],
-                src["ado_pr"],
-                group_id,
-            ),
-        )
-        new_id = cur.lastrowid
+        new_id, before, after = change
+        action_type = "duplicate_link_entry" if link else "duplicate_entry"
+        return _with_entry(_commit_change(conn, action_type, before, after), new_id)
+
+    return _submit(db_path, job)
 
-        # Copy splits from source
-        src_splits = conn.execute(
-            "SELECT * FROM entry_imputations WHERE entry_id = ? ORDER BY position",
-            (entry_id,),
-        ).fetchall()
-        for s in src_splits:
-            conn.execute(
-                "INSERT INTO entry_imputations (entry_id, account_id, duration, position) VALUES (?, ?, ?, ?)",
-                (new_id, s["account_id"], s["duration"], s["position"]),
-            )
 
-        # Copy ADO items from source
-        src_ado_items = conn.execute(
-            "SELECT * FROM entry_ado_items WHERE entry_id = ? ORDER BY position",
-            (entry_id,),
+def _delete_entry(conn, entry_id):
+    row = conn.execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
+    if not row:
+        return None
+
+    entry = dict(row)
+    group_id = entry.get("group_id")
+
+    # Determine all affected entries
+    affected_ids = [entry_id]
+    cleanup_target_id = None
+    if group_id:
+        remaining = conn.execute(
+            "SELECT id FROM entries WHERE group_id = ? AND id != ?",
+            (group_id, entry_id),
         ).fetchall()
-        for a in src_ado_items:
-            conn.execute(
-                "INSERT INTO entry_ado_items (entry_id, link_type_id, value, position) VALUES (?, ?, ?, ?)",
-                (new_id, a["link_type_id"], a["value"], a["position"]),
-            )
+        if len(remaining) == 1:
+            cleanup_target_id = remaining[0]["id"]
+            affected_ids.append(cleanup_target_id)
 
-        # After snapshot: new entry + source if modified
-        after_ids = [new_id]
-        if link and not src["group_id"]:
-            after_ids.append(entry_id)
-        after = _snapshot_entries(conn, after_ids)
+    # Snapshot BEFORE
+    before = _snapshot_entries(conn, affected_ids)
 
-        action_type = "duplicate_link_entry" if link else "duplicate_entry"
-        _record_undo(conn, action_type, before, after)
-        conn.commit()
+    # Delete
+    conn.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+    if group_id:
+        _cleanup_group(conn, group_id)
 
-        new_row = conn.execute(_ENTRY_QUERY + " WHERE id = ?", (new_id,)).fetchone()
-        entry = dict(new_row)
-        _attach_splits(conn, [entry])
-        _attach_ado_items(conn, [entry])
-        return entry
+    # Snapshot AFTER (only cleanup target if it exists)
+    after_ids = [cleanup_target_id] if cleanup_target_id else []
+    after = _snapshot_entries(conn, after_ids)
+    return entry_id, before, after
 
 
 def delete_entry(db_path, entry_id):
-    with get_connection(db_path) as conn:
-        row = conn.execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
-        if not row:
-            return
+    def job(conn):
+        change = _delete_entry(conn, entry_id)
+        if change is None:
+            return None
+        _, before, after = change
+        return {"ok": True, **_commit_change(conn, "delete_entry", before, after)}
 
-        entry = dict(row)
-        group_id = entry.get("group_id")
-
-        # Determine all affected entries
-        affected_ids = [entry_id]
-        cleanup_target_id = None
-        if group_id:
-            remaining = conn.execute(
-                "SELECT id FROM entries WHERE group_id = ? AND id != ?",
-                (group_id, entry_id),
-            ).fetchall()
-            if len(remaining) == 1:
-                cleanup_target_id = remaining[0]["id"]
-                affected_ids.append(cleanup_target_id)
-
-        # Snapshot BEFORE
-        before = _snapshot_entries(conn, affected_ids)
-
-        # Delete
-        conn.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
-        if group_id:
-            _cleanup_group(conn, group_id)
-
-        # Snapshot AFTER (only cleanup target if it exists)
-        after_ids = [cleanup_target_id] if cleanup_target_id else []
-        after = _snapshot_entries(conn, after_ids)
-
-        _record_undo(conn, "delete_entry", before, after)
-        conn.commit()
+    return _submit(db_path, job)
 
 
-def reorder_entry(db_path, entry_id, before_id):
-    """Move entry to be positioned before before_id within its day, or to the end if before_id is None."""
+def _reorder_entry(conn, entry_id, before_id):
     if before_id is not None and before_id == entry_id:
-        return {"ok": True}
-    with get_connection(db_path) as conn:
-        row = conn.execute("SELECT date FROM entries WHERE id = ?", (entry_id,)).fetchone()
-        if not row:
-            return None
-        date = row["date"]
+        return entry_id, [], []
+    row = conn.execute("SELECT date FROM entries WHERE id = ?", (entry_id,)).fetchone()
+    if not row:
+        return None
+    date = row["date"]
 
-        rows = conn.execute(
-            "SELECT id FROM entries WHERE date = ? ORDER BY COALESCE(sort_order, id), id",
-            (date,),
-        ).fetchall()
-        ids = [r["id"] for r in rows]
+    rows = conn.execute(
+        "SELECT id FROM entries WHERE date = ? ORDER BY COALESCE(sort_order, id), id",
+        (date,),
+    ).fetchall()
+    ids = [r["id"] for r in rows]
 
-        before = _snapshot_entries(conn, ids)
+    before = _snapshot_entries(conn, ids)
 
-        ids = [i for i in ids if i != entry_id]
-        if before_id is not None and before_id in ids:
-            idx = ids.index(before_id)
-            ids.insert(idx, entry_id)
-        else:
-            ids.append(entry_id)
+    ids = [i for i in ids if i != entry_id]
+    if before_id is not None and before_id in ids:
+        idx = ids.index(before_id)
+        ids.insert(idx, entry_id)
+    else:
+        ids.append(entry_id)
 
-        for i, eid in enumerate(ids):
-            conn.execute("UPDATE entries SET sort_order = ? WHERE id = ?", (i, eid))
+    for i, eid in enumerate(ids):
+        conn.execute("UPDATE entries SET sort_order = ? WHERE id = ?", (i, eid))
 
-        after = _snapshot_entries(conn, ids)
-        _record_undo(conn, "reorder_entry", before, after)
-        conn.commit()
+    after = _snapshot_entries(conn, ids)
+    return entry_id, before, after
+
+
+def reorder_entry(db_path, entry_id, before_id):
+    """Move entry to be positioned before before_id within its day, or to the end if before_id is None."""
+    if before_id is not None and before_id == entry_id:
         return {"ok": True}
+    def job(conn):
+        change = _reorder_entry(conn, entry_id, before_id)
+        if change is None:
+            return None
+        _, before, after = change
+        return {"ok": True, **_commit_change(conn, "reorder_entry", before, after)}
+
+    return _submit(db_path, job)
 
 
 def _cleanup_group(conn, group_id):
@@ -694,216 +1740,765 @@ SHARED_FIELDS = {"description"}
 
 def get_group_entries(db_path, group_id):
     with get_connection(db_path) as conn:
+        conn.execute("BEGIN")  # one read snapshot for the rows and their children
         rows = conn.execute(
             _ENTRY_QUERY + " WHERE group_id = ? ORDER BY date DESC, id",
             (group_id,),
         ).fetchall()
-        entries = [dict(r) for r in rows]
-        _attach_splits(conn, entries)
-        _attach_ado_items(conn, entries)
+        entries = _hydrate(conn, rows)
         return entries
 
 
 def update_group_shared(db_path, group_id, data):
     """Propagate shared field changes to all entries in a group."""
-    with get_connection(db_path) as conn:
+    def job(conn):
         updates = {k: v for k, v in data.items() if k in SHARED_FIELDS}
         if not updates:
             return
         set_clause = ", ".join(f"{k} = ?" for k in updates)
         values = list(updates.values()) + [group_id]
         conn.execute(f"UPDATE entries SET {set_clause} WHERE group_id = ?", values)
+        group_ids = [r["id"] for r in conn.execute(
+            "SELECT id FROM entries WHERE group_id = ?", (group_id,)
+        ).fetchall()]
+        _mark_changed(conn, group_ids)
         conn.commit()
 
+    return _submit(db_path, job)
+
+
+def _ungroup_entry(conn, entry_id):
+    """Remove an entry from its group. If only one remains, dissolve the group."""
+    row = conn.execute("SELECT group_id FROM entries WHERE id = ?", (entry_id,)).fetchone()
+    if not row or not row["group_id"]:
+        return None
+    group_id = row["group_id"]
+
+    # Determine affected entries
+    affected_ids = [entry_id]
+    remaining = conn.execute(
+        "SELECT id FROM entries WHERE group_id = ? AND id != ?",
+        (group_id, entry_id),
+    ).fetchall()
+    if len(remaining) == 1:
+        affected_ids.append(remaining[0]["id"])
+
+    # Snapshot BEFORE
+    before = _snapshot_entries(conn, affected_ids)
+
+    conn.execute("UPDATE entries SET group_id = NULL WHERE id = ?", (entry_id,))
+    _cleanup_group(conn, group_id)
+
+    # Snapshot AFTER
+    after = _snapshot_entries(conn, affected_ids)
+    return entry_id, before, after
+
 
 def ungroup_entry(db_path, entry_id):
     """Remove an entry from its group. If only one remains, dissolve the group."""
-    with get_connection(db_path) as conn:
-        row = conn.execute("SELECT group_id FROM entries WHERE id = ?", (entry_id,)).fetchone()
-        if not row or not row["group_id"]:
-            return
-        group_id = row["group_id"]
+    def job(conn):
+        change = _ungroup_entry(conn, entry_id)
+        if change is None:
+            return None
+        _, before, after = change
+        return {"ok": True, **_commit_change(conn, "ungroup_entry", before, after)}
 
-        # Determine affected entries
-        affected_ids = [entry_id]
-        remaining = conn.execute(
-            "SELECT id FROM entries WHERE group_id = ? AND id != ?",
-            (group_id, entry_id),
-        ).fetchall()
-        if len(remaining) == 1:
-            affected_ids.append(remaining[0]["id"])
+    return _submit(db_path, job)
 
-        # Snapshot BEFORE
-        before = _snapshot_entries(conn, affected_ids)
 
-        conn.execute("UPDATE entries SET group_id = NULL WHERE id = ?", (entry_id,))
-        _cleanup_group(conn, group_id)
+def _link_entries(conn, entry_id, target_entry_id, resolution=None):
+    """Link two entries into a group, applying conflict resolution for shared fields."""
+    src = conn.execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
+    tgt = conn.execute("SELECT * FROM entries WHERE id = ?", (target_entry_id,)).fetchone()
+    if not src or not tgt:
+        return None
+
+    src = dict(src)
+    tgt = dict(tgt)
+
+    # Determine the group_id to use
+    if tgt["group_id"]:
+        group_id = tgt["group_id"]
+    elif src["group_id"]:
+        group_id = src["group_id"]
+    else:
+        group_id = str(uuid.uuid4())
+
+    # Collect ALL affected entry IDs
+    affected_ids = {entry_id, target_entry_id}
+    if tgt["group_id"]:
+        rows = conn.execute("SELECT id FROM entries WHERE group_id = ?", (tgt["group_id"],)).fetchall()
+        for r in rows:
+            affected_ids.add(r["id"])
+    if src["group_id"]:
+        rows = conn.execute("SELECT id FROM entries WHERE group_id = ?", (src["group_id"],)).fetchall()
+        for r in rows:
+            affected_ids.add(r["id"])
+
+    # Snapshot BEFORE
+    before = _snapshot_entries(conn, list(affected_ids))
+
+    # Apply resolution to determine shared field values
+    resolved = {}
+    if resolution:
+        for field, value in resolution.items():
+            if field in SHARED_FIELDS:
+                resolved[field] = value
+    else:
+        for field in SHARED_FIELDS:
+            resolved[field] = tgt[field]
+
+    # Set group_id on source entry
+    conn.execute("UPDATE entries SET group_id = ? WHERE id = ?", (group_id, entry_id))
+
+    # If target didn't have a group_id, set it now
+    if not tgt["group_id"]:
+        conn.execute("UPDATE entries SET group_id = ? WHERE id = ?", (group_id, target_entry_id))
+
+    # Apply resolved shared fields to ALL entries in the group
+    if resolved:
+        set_clause = ", ".join(f"{k} = ?" for k in resolved)
+        values = list(resolved.values()) + [group_id]
+        conn.execute(f"UPDATE entries SET {set_clause} WHERE group_id = ?", values)
 
-        # Snapshot AFTER
-        after = _snapshot_entries(conn, affected_ids)
-        _record_undo(conn, "ungroup_entry", before, after)
-        conn.commit()
+    # Merge ADO items across all group members (DISTINCT on link_type_id+value)
+    all_group_ids = list(affected_ids)
+    ph = ",".join("?" * len(all_group_ids))
+    all_ado = conn.execute(f"""
+        SELECT DISTINCT link_type_id, value FROM entry_ado_items
+        WHERE entry_id IN ({ph})
+    """, all_group_ids).fetchall()
+    merged_items = [dict(r) for r in all_ado]
+    # Apply merged set to every group member
+    _defer_search(conn)
+    for aid in all_group_ids:
+        conn.execute("DELETE FROM entry_ado_items WHERE entry_id = ?", (aid,))
+        for i, a in enumerate(merged_items):
+            conn.execute(
+                "INSERT INTO entry_ado_items (entry_id, link_type_id, value, position) VALUES (?, ?, ?, ?)",
+                (aid, a["link_type_id"], a["value"], i),
+            )
+    _refresh_search(conn, all_group_ids)
+
+    # Snapshot AFTER
+    after = _snapshot_entries(conn, list(affected_ids))
+    return entry_id, before, after
 
 
 def link_entries(db_path, entry_id, target_entry_id, resolution=None):
     """Link two entries into a group, applying conflict resolution for shared fields."""
+    def job(conn):
+        change = _link_entries(conn, entry_id, target_entry_id, resolution)
+        if change is None:
+            return None
+        _, before, after = change
+        return _with_entry(_commit_change(conn, "link_entries", before, after), entry_id)
+
+    return _submit(db_path, job)
+
+
+# --- Batch ---
+
+_BATCH_OPS = {
+    "create": lambda conn, op: _create_entry(conn, op.get("data") or {}),
+    "update": lambda conn, op: _update_entry(conn, op["id"], op.get("data") or {}),
+    "duplicate": lambda conn, op: _duplicate_entry(conn, op["id"], op["date"], link=op.get("link", False)),
+    "delete": lambda conn, op: _delete_entry(conn, op["id"]),
+    "reorder": lambda conn, op: _reorder_entry(conn, op["id"], op.get("before_id")),
+    "ungroup": lambda conn, op: _ungroup_entry(conn, op["id"]),
+    "link": lambda conn, op: _link_entries(conn, op["id"], op["target_entry_id"], op.get("resolution")),
+}
+
+
+def perform_batch(db_path, operations):
+    """Apply several entry operations in one transaction and one undo step.
+
+    Each operation is a dict with an "op" key (see _BATCH_OPS) plus that
+    operation's arguments. If any operation is malformed or fails nothing is
+    applied, and {"ok": False, "reason", "index"} names the first one.
+    """
+    def job(conn):
+        before_by_id = {}
+        seen = set()
+        results = []
+        for index, op in enumerate(operations):
+            if not isinstance(op, dict) or not isinstance(op.get("op"), str):
+                conn.rollback()
+                return {"ok": False, "reason": "invalid_op", "index": index}
+            handler = _BATCH_OPS.get(op["op"])
+            if handler is None:
+                conn.rollback()
+                return {"ok": False, "reason": "unknown_op", "index": index}
+            try:
+                change = handler(conn, op)
+            except (KeyError, TypeError, ValueError, AttributeError, sqlite3.Error):
+                # Missing or malformed arguments, or a row the schema rejects
+                change = None
+            if change is None:
+                conn.rollback()
+                return {"ok": False, "reason": "op_failed", "index": index}
+            result_id, before, after = change
+            # The batch's before state is each entry as first seen; entries
+            # first seen in an after snapshot were created by the batch.
+            for e in before:
+                if e["id"] not in seen:
+                    before_by_id[e["id"]] = e
+                    seen.add(e["id"])
+            seen.update(e["id"] for e in after)
+            results.append(result_id)
+        after = _snapshot_entries(conn, list(seen))
+        delta = _commit_change(conn, "batch", list(before_by_id.values()), after)
+        return {"ok": True, "results": results, **delta}
+
+    return _submit(db_path, job)
+
+
+SUGGEST_LIMIT = 50
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _word_match(text, op):
+    """Build an FTS query matching the words of text as prefixes, joined by op."""
+    return f" {op} ".join(f'"{w}"*' for w in _WORD_RE.findall(text.lower()))
+
+
+def _like_pattern(text):
+    """Build a LIKE pattern (with ESCAPE '\\') matching text anywhere."""
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _encode_suggest_cursor(key):
+    neg_score, date, entry_id = key
+    return f"{-neg_score}|{date}|{entry_id}"
+
+
+def _decode_suggest_cursor(cursor):
+    score, date, entry_id = cursor.split("|")
+    return -int(score), date, int(entry_id)
+
+
+def suggest_groups(db_path, entry_id, q=None, limit=SUGGEST_LIMIT, cursor=None):
+    """Return the groups (or single entries) most similar to the given entry.
+
+    Candidates come from the indexes only: entries sharing an ADO item with
+    the source, or a description word with it. When q is given, candidates are
+    instead the entries matching q by description word prefix, ADO value
+    substring (case-insensitive) or date prefix. Each candidate is scored +10
+    per shared ADO item, +3 when one description contains the other and +1
+    when it is grouped; every group is represented by its best member.
+    Returns up to `limit` of them and a cursor for the next page.
+    """
     with get_connection(db_path) as conn:
+        conn.execute("BEGIN")  # the page is hydrated from the same snapshot
         src = conn.execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
-        tgt = conn.execute("SELECT * FROM entries WHERE id = ?", (target_entry_id,)).fetchone()
-        if not src or not tgt:
-            return None
+        if not src:
+            return {"suggestions": [], "next_cursor": None}
+        src_desc = (src["description"] or "").lower()
+
+        ado_scores = dict(conn.execute("""
+            SELECT i.entry_id, COUNT(*) * 10 FROM entry_ado_items i
+            JOIN (SELECT DISTINCT link_type_id, value FROM entry_ado_items WHERE entry_id = ?) s
+                ON i.link_type_id = s.link_type_id AND i.value = s.value
+            GROUP BY i.entry_id
+        """, (entry_id,)).fetchall())
+
+        ids = set()
+        if q:
+            match = _word_match(q, "AND")
+            if match:
+                ids.update(r[0] for r in conn.execute(
+                    "SELECT rowid FROM entry_words WHERE entry_words MATCH ?", (match,)
+                ))
+            # ADO values match anywhere and in any case, through the trigram
+            # index; shorter terms can't use it and scan the search table
+            if len(q) >= 3:
+                ado_where, ado_param = "entry_search MATCH ?", 'ado : "' + q.replace('"', '""') + '"'
+            else:
+                ado_where, ado_param = "ado LIKE ? ESCAPE '\\'", _like_pattern(q)
+            ids.update(r[0] for r in conn.execute(
+                f"SELECT rowid FROM entry_search WHERE {ado_where}", (ado_param,)
+            ))
+            ids.update(r[0] for r in conn.execute(
+                "SELECT id FROM entries WHERE date >= ? AND date < ?", (q, q + "\uffff")
+            ))
+        else:
+            ids.update(ado_scores)
+            match = _word_match(src_desc, "OR")
+            if match:
+                ids.update(r[0] for r in conn.execute(
+                    "SELECT rowid FROM entry_words WHERE entry_words MATCH ?", (match,)
+                ))
+        ids.discard(entry_id)
+
+        # Score on the bare columns; only the returned page gets hydrated
+        best = {}
+        for row in conn.execute(
+            "SELECT id, date, description, group_id FROM entries WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(ids)),),
+        ):
+            if src["group_id"] and row["group_id"] == src["group_id"]:
+                continue
+            score = ado_scores.get(row["id"], 0)
+            desc = (row["description"] or "").lower()
+            if src_desc and desc and (src_desc in desc or desc in src_desc):
+                score += 3
+            if row["group_id"]:
+                score += 1
+            key = (-score, row["date"], row["id"])
+            group = row["group_id"] or row["id"]
+            if group not in best or key < best[group]:
+                best[group] = key
+
+        ranked = best.values()
+        if cursor:
+            after = _decode_suggest_cursor(cursor)
+            ranked = [k for k in ranked if k > after]
+        page = heapq.nsmallest(limit + 1, ranked)
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = _encode_suggest_cursor(page[-1])
+
+        by_id = {e["id"]: e for e in _get_entries(conn, [k[2] for k in page])}
+        return {"suggestions": [by_id[k[2]] for k in page], "next_cursor": next_cursor}
+
+
+# --- Reports ---
+
+# SQL expression for the period a rollup date falls in; weeks start on Monday
+REPORT_PERIODS = {
+    "day": "r.date",
+    "week": "date(r.date, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m', r.date)",
+}
+REPORT_GROUPINGS = tuple(REPORT_PERIODS) + ("account", "project")
+
+
+def imputation_report(db_path, date_from, date_to, group_by="day"):
+    """Sum imputed durations between date_from and date_to (inclusive).
+
+    group_by "day", "week" or "month" returns one row per period and account
+    plus per-period totals; "account" one row per account; "project" one row
+    per project. Everything is read from daily_rollups, so the cost follows
+    the number of days and accounts in range, not the number of entries.
+    """
+    if group_by not in REPORT_GROUPINGS:
+        raise ValueError(f"group_by must be one of {', '.join(REPORT_GROUPINGS)}")
+    accounts = """
+        FROM daily_rollups r
+        LEFT JOIN imputation_accounts a ON a.id = r.account_id
+        WHERE r.account_id != 0 AND r.date >= ? AND r.date <= ?
+    """
+    days = "FROM daily_rollups r WHERE r.account_id = 0 AND r.date >= ? AND r.date <= ?"
+    params = (date_from, date_to)
+    account_cols = """r.account_id, COALESCE(a.number, '?') AS account_number,
+        COALESCE(a.description, '') AS account_description, COALESCE(a.project, '') AS account_project"""
+    result = {"group_by": group_by, "from": date_from, "to": date_to}
+    with get_connection(db_path) as conn:
+        conn.execute("BEGIN")  # one read snapshot for the rows and the totals
+        if group_by == "project":
+            rows = conn.execute(f"""
+                SELECT COALESCE(a.project, '') AS project, SUM(r.imputed) AS duration
+                {accounts} GROUP BY 1 ORDER BY 1
+            """, params).fetchall()
+        elif group_by == "account":
+            rows = conn.execute(f"""
+                SELECT {account_cols}, SUM(r.imputed) AS duration
+                {accounts} GROUP BY r.account_id ORDER BY account_number, r.account_id
+            """, params).fetchall()
+        else:
+            period = REPORT_PERIODS[group_by]
+            rows = conn.execute(f"""
+                SELECT {period} AS period, {account_cols}, SUM(r.imputed) AS duration
+                {accounts} GROUP BY period, r.account_id ORDER BY period, account_number, r.account_id
+            """, params).fetchall()
+            result["periods"] = [dict(r) for r in conn.execute(f"""
+                SELECT {period} AS period, SUM(r.imputed) AS duration
+                {days} AND r.imputed != 0 GROUP BY period ORDER BY period
+            """, params).fetchall()]
+        result["rows"] = [dict(r) for r in rows]
+        result["total"] = conn.execute(f"SELECT COALESCE(SUM(r.imputed), 0) {days}", params).fetchone()[0]
+    return result
 
-        src = dict(src)
-        tgt = dict(tgt)
 
-        # Determine the group_id to use
-        if tgt["group_id"]:
-            group_id = tgt["group_id"]
-        elif src["group_id"]:
-            group_id = src["group_id"]
-        else:
-            group_id = str(uuid.uuid4())
+# --- Export ---
 
-        # Collect ALL affected entry IDs
-        affected_ids = {entry_id, target_entry_id}
-        if tgt["group_id"]:
-            rows = conn.execute("SELECT id FROM entries WHERE group_id = ?", (tgt["group_id"],)).fetchall()
-            for r in rows:
-                affected_ids.add(r["id"])
-        if src["group_id"]:
-            rows = conn.execute("SELECT id FROM entries WHERE group_id = ?", (src["group_id"],)).fetchall()
-            for r in rows:
-                affected_ids.add(r["id"])
-
-        # Snapshot BEFORE
-        before = _snapshot_entries(conn, list(affected_ids))
-
-        # Apply resolution to determine shared field values
-        resolved = {}
-        if resolution:
-            for field, value in resolution.items():
-                if field in SHARED_FIELDS:
-                    resolved[field] = value
-        else:
-            for field in SHARED_FIELDS:
-                resolved[field] = tgt[field]
-
-        # Set group_id on source entry
-        conn.execute("UPDATE entries SET group_id = ? WHERE id = ?", (group_id, entry_id))
-
-        # If target didn't have a group_id, set it now
-        if not tgt["group_id"]:
-            conn.execute("UPDATE entries SET group_id = ? WHERE id = ?", (group_id, target_entry_id))
-
-        # Apply resolved shared fields to ALL entries in the group
-        if resolved:
-            set_clause = ", ".join(f"{k} = ?" for k in resolved)
-            values = list(resolved.values()) + [group_id]
-            conn.execute(f"UPDATE entries SET {set_clause} WHERE group_id = ?", values)
-
-        # Merge ADO items across all group members (DISTINCT on link_type_id+value)
-        all_group_ids = list(affected_ids)
-        ph = ",".join("?" * len(all_group_ids))
-        all_ado = conn.execute(f"""
-            SELECT DISTINCT link_type_id, value FROM entry_ado_items
-            WHERE entry_id IN ({ph})
-        """, all_group_ids).fetchall()
-        merged_items = [dict(r) for r in all_ado]
-        # Apply merged set to every group member
-        for aid in all_group_ids:
-            conn.execute("DELETE FROM entry_ado_items WHERE entry_id = ?", (aid,))
-            for i, a in enumerate(merged_items):
-                conn.execute(
-                    "INSERT INTO entry_ado_items (entry_id, link_type_id, value, position) VALUES (?, ?, ?, ?)",
-                    (aid, a["link_type_id"], a["value"], i),
-                )
+EXPORT_COLUMNS = [
+    "date", "entry_id", "duration", "description", "notes", "group_id",
+    "account_number", "account_project", "account_description", "imputed_duration", "ado_items",
+]
 
-        # Snapshot AFTER
-        after = _snapshot_entries(conn, list(affected_ids))
-        _record_undo(conn, "link_entries", before, after)
+
+def iter_export_rows(db_path, date_from=None, date_to=None):
+    """Yield one flat row per entry and split (one row for an entry without
+    splits), oldest first, as tuples in EXPORT_COLUMNS order.
+
+    Rows are read straight off the cursor, so memory stays flat whatever the
+    range. ADO items are joined as "Link type:value" pairs separated by "; ".
+    """
+    clauses = []
+    params = []
+    if date_from:
+        clauses.append("e.date >= ?")
+        params.append(date_from)
+    if date_to:
+        clauses.append("e.date <= ?")
+        params.append(date_to)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    with get_connection(db_path) as conn:
+        conn.execute("BEGIN")  # one read snapshot for the whole export
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute(f"""
+            SELECT e.date, e.id, e.duration, e.description, e.notes, COALESCE(e.group_id, ''),
+                   COALESCE(a.number, ''), COALESCE(a.project, ''), COALESCE(a.description, ''),
+                   ei.duration,
+                   COALESCE((SELECT group_concat(lt.title || ':' || ai.value, '; ')
+                             FROM (SELECT * FROM entry_ado_items WHERE entry_id = e.id ORDER BY position) ai
+                             JOIN ado_link_types lt ON lt.id = ai.link_type_id), '')
+            FROM entries e
+            LEFT JOIN entry_imputations ei ON ei.entry_id = e.id
+            LEFT JOIN imputation_accounts a ON a.id = ei.account_id
+            {where}
+            ORDER BY e.date, COALESCE(e.sort_order, e.id), e.id, ei.position, ei.id
+        """, params)
+        yield from cur
+
+
+# --- Import ---
+
+IMPORT_BATCH_SIZE = 1000
+
+
+def _import_int(record, key, default=None):
+    value = record.get(key)
+    if value is None or value == "":
+        if default is None:
+            raise ValueError(f"{key} is required")
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be an integer, got {value!r}")
+    if number < 0:
+        raise ValueError(f"{key} must not be negative")
+    return number
+
+
+def _import_ado_items(text, link_types):
+    items = []
+    for part in (text or "").split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        title, sep, value = part.partition(":")
+        link_type_id = link_types.get(title.strip().lower())
+        if not sep or link_type_id is None:
+            raise ValueError(f"unknown ADO link type in {part!r}")
+        items.append((link_type_id, value.strip()))
+    return items
+
+
+def import_entries(db_path, records, batch_size=IMPORT_BATCH_SIZE):
+    """Insert entries from an iterable of flat records, as one undoable step.
+
+    Records use the export columns (EXPORT_COLUMNS); consecutive records
+    sharing an entry_id become one entry with several splits, and entry_id
+    itself is only used for that grouping. Accounts are matched by number and
+    ADO link types by title; group ids are remapped to fresh ones. The first
+    invalid record aborts the whole import. Rows are written with executemany
+    in batches of `batch_size` entries, as one job on the writer, whose
+    transaction is already open when ids are allocated. A record that can't
+    be parsed is reported with the row number it would have had.
+    """
+    def job(conn):
+        started = time.perf_counter()
+        accounts = {r["number"]: r["id"] for r in conn.execute("SELECT id, number FROM imputation_accounts")}
+        link_types = {r["title"].lower(): r["id"] for r in conn.execute("SELECT id, title FROM ado_link_types")}
+        seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'entries'").fetchone()
+        next_id = max(seq[0] if seq else 0, conn.execute("SELECT COALESCE(MAX(id), 0) FROM entries").fetchone()[0]) + 1
+        first_id = next_id
+        groups = {}
+        entry_rows, split_rows, ado_rows = [], [], []
+        counts = {"rows": 0, "entries": 0, "splits": 0, "ado_items": 0}
+        current_key = None
+
+        def flush():
+            conn.executemany(
+                "INSERT INTO entries (id, date, duration, description, notes, group_id) VALUES (?, ?, ?, ?, ?, ?)",
+                entry_rows,
+            )
+            conn.executemany(
+                "INSERT INTO entry_imputations (entry_id, account_id, duration, position) VALUES (?, ?, ?, ?)",
+                split_rows,
+            )
+            conn.executemany(
+                "INSERT INTO entry_ado_items (entry_id, link_type_id, value, position) VALUES (?, ?, ?, ?)",
+                ado_rows,
+            )
+            entry_rows.clear()
+            split_rows.clear()
+            ado_rows.clear()
+
+        _defer_search(conn)
+        reading = True  # an error while fetching a record belongs to the next row
+        try:
+            for record in records:
+                reading = False
+                counts["rows"] += 1
+                key = record.get("entry_id")
+                if key in (None, "") or key != current_key:
+                    if len(entry_rows) >= batch_size:
+                        flush()
+                    # Stored canonical (YYYY-MM-DD): ordering, cursors and rollups rely on it
+                    date = datetime.date.fromisoformat(str(record.get("date") or "")).isoformat()
+                    group_id = record.get("group_id") or None
+                    if group_id:
+                        group_id = groups.setdefault(group_id, str(uuid.uuid4()))
+                    entry_id = next_id
+                    next_id += 1
+                    split_position = 0
+                    entry_rows.append((
+                        entry_id, date, _import_int(record, "duration"),
+                        str(record.get("description") or ""), str(record.get("notes") or ""), group_id,
+                    ))
+                    for position, (link_type_id, value) in enumerate(
+                        _import_ado_items(record.get("ado_items"), link_types)
+                    ):
+                        ado_rows.append((entry_id, link_type_id, value, position))
+                        counts["ado_items"] += 1
+                    counts["entries"] += 1
+                    current_key = key
+                number = record.get("account_number")
+                if number not in (None, ""):
+                    if str(number) not in accounts:
+                        raise ValueError(f"unknown account number {number!r}")
+                    split_rows.append((entry_id, accounts[str(number)],
+                                       _import_int(record, "imputed_duration"), split_position))
+                    split_position += 1
+                    counts["splits"] += 1
+                reading = True
+            flush()
+        except ValueError as e:
+            conn.rollback()
+            line = counts["rows"] + 1 if reading else counts["rows"]
+            return {"ok": False, "reason": "invalid_row", "line": line, "error": str(e)}
+
+        new_ids = list(range(first_id, next_id))
+        _refresh_search(conn, new_ids)
+        after = []
+        for i in range(0, len(new_ids), 500):
+            after.extend(_snapshot_entries(conn, new_ids[i:i + 500]))
+        _record_undo(conn, "import", [], after)
         conn.commit()
+        seconds = time.perf_counter() - started
+        return {
+            "ok": True,
+            **counts,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(counts["rows"] / seconds) if seconds else counts["rows"],
+            "version": _current_version(conn),
+            "undo": _undo_status(conn),
+            "total": _history_total(conn),
+        }
+
+    return _submit(db_path, job)
+
+
+# --- Search ---
+
+SEARCH_LIMIT = 50
+# Matched text in snippets is wrapped in these control characters
+SEARCH_HIGHLIGHT = ("\x02", "\x03")
 
-        # Return the updated entry
-        row = conn.execute(_ENTRY_QUERY + " WHERE id = ?", (entry_id,)).fetchone()
-        entry = dict(row)
-        _attach_splits(conn, [entry])
-        _attach_ado_items(conn, [entry])
-        return entry
 
+def search_entries(db_path, q, limit=SEARCH_LIMIT, cursor=None, date_from=None):
+    """Find entries whose description, notes or ADO values contain q (case-insensitive),
+    optionally only those dated date_from or later.
 
-def suggest_groups(db_path, entry_id):
-    """Return entries/groups ranked by similarity to the given entry."""
+    Returns {"results": [{"id", "date", "snippet"}], "total", "next_cursor"},
+    best matches first. The cursor is the offset of the next page. Terms
+    shorter than three characters can't use the trigram index and fall back to
+    a scan of the search table, newest first and without snippets.
+    """
+    offset = int(cursor) if cursor else 0
+    if offset < 0:
+        raise ValueError("negative cursor")
+    q = q.strip()
+    if not q:
+        return {"results": [], "total": 0, "next_cursor": None}
     with get_connection(db_path) as conn:
-        src = conn.execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
-        if not src:
-            return []
-        src = dict(src)
+        conn.execute("BEGIN")  # one read snapshot for the count and the page
+        if len(q) >= 3:
+            where = "s.entry_search MATCH ?"
+            params = ['"' + q.replace('"', '""') + '"']
+            snippet = "snippet(entry_search, -1, ?, ?, '…', 12)"
+            order = "s.rank, e.date DESC, e.id"
+            snippet_params = list(SEARCH_HIGHLIGHT)
+        else:
+            pattern = _like_pattern(q)
+            where = " OR ".join(f"s.{col} LIKE ? ESCAPE '\\'" for col in ("description", "notes", "ado"))
+            params = [pattern] * 3
+            snippet = "NULL"
+            order = "e.date DESC, e.id"
+            snippet_params = []
+        if date_from:
+            where = f"({where}) AND e.date >= ?"
+            params.append(date_from)
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM entry_search s JOIN entries e ON e.id = s.rowid WHERE {where}", params
+        ).fetchone()[0]
+        rows = conn.execute(f"""
+            SELECT s.rowid AS id, e.date, {snippet} AS snippet
+            FROM entry_search s JOIN entries e ON e.id = s.rowid
+            WHERE {where}
+            ORDER BY {order} LIMIT ? OFFSET ?
+        """, snippet_params + params + [limit, offset]).fetchall()
+    next_offset = offset + len(rows)
+    return {
+        "results": [dict(r) for r in rows],
+        "total": total,
+        "next_cursor": str(next_offset) if next_offset < total else None,
+    }
+
+
+# --- Incremental backups ---
+
+# Between full backups, only what changed is saved: every entry stamped in
+# entry_versions after the last backup (its current snapshot, or its id when
+# deleted), plus the small accounts and link types tables whole. The change
+# version and reference fingerprint of the last backup are kept in app_meta.
+
+def _reference_fingerprint(conn):
+    digest = hashlib.sha1()
+    for table in ("imputation_accounts", "ado_link_types"):
+        for row in conn.execute(f"SELECT * FROM {table} ORDER BY id"):
+            digest.update(repr(tuple(row)).encode())
+    return int(digest.hexdigest()[:15], 16)  # fits app_meta's integer column
+
+
+def backup_mark(db_path):
+    """Return (version, reference) of the last backup, or None if none was recorded."""
+    with get_connection(db_path) as conn:
+        rows = dict(conn.execute(
+            "SELECT key, value FROM app_meta WHERE key IN ('backup_version', 'backup_reference')"
+        ).fetchall())
+    if len(rows) < 2:
+        return None
+    return rows["backup_version"], rows["backup_reference"]
 
-        # Get all other entries (exclude same entry and entries already in same group)
-        params = [entry_id]
-        where_extra = ""
-        if src["group_id"]:
-            where_extra = " AND (group_id IS NULL OR group_id != ?)"
-            params.append(src["group_id"])
 
-        rows = conn.execute(
-            _ENTRY_QUERY + f" WHERE id != ?{where_extra} ORDER BY date DESC, id",
-            params,
-        ).fetchall()
-        candidates = [dict(r) for r in rows]
-        _attach_splits(conn, candidates)
-        _attach_ado_items(conn, candidates)
-
-        # Also attach ADO items to source
-        _attach_ado_items(conn, [src])
-        src_ado_set = set()
-        for a in src.get("ado_items", []):
-            src_ado_set.add((a["link_type_id"], a["value"]))
-
-    # Score by similarity
-    def score(entry):
-        s = 0
-        # +10 per shared ADO item (link_type_id + value match)
-        for a in entry.get("ado_items", []):
-            if (a["link_type_id"], a["value"]) in src_ado_set:
-                s += 10
-        if src["description"] and entry["description"] and (
-            src["description"].lower() in entry["description"].lower()
-            or entry["description"].lower() in src["description"].lower()
-        ):
-            s += 3
-        if entry["group_id"]:
-            s += 1
-        return s
+def set_backup_mark(db_path, version, reference):
+    with get_connection(db_path, write=True) as conn:
+        _set_meta(conn, backup_version=version, backup_reference=reference)
+        conn.commit()
 
-    candidates.sort(key=lambda e: (-score(e), e["date"]))
-    return candidates
+
+def changes_since(db_path, since):
+    """Return the changes after change version `since`, from one read snapshot:
+    {"from_version", "to_version", "reference", "entries" (snapshots),
+    "deleted" (ids), "accounts", "link_types"}."""
+    with get_connection(db_path) as conn:
+        conn.execute("BEGIN")  # one read snapshot for everything below
+        version = _current_version(conn)
+        # Sorted here: ORDER BY entry_id would trade the version index for a scan
+        ids = sorted(r[0] for r in conn.execute(
+            "SELECT entry_id FROM entry_versions WHERE version > ?", (since,)
+        ))
+        entries = []
+        for i in range(0, len(ids), 500):
+            entries.extend(_snapshot_entries(conn, ids[i:i + 500]))
+        present = {e["id"] for e in entries}
+        return {
+            "from_version": since,
+            "to_version": version,
+            "reference": _reference_fingerprint(conn),
+            "entries": entries,
+            "deleted": [i for i in ids if i not in present],
+            "accounts": [dict(r) for r in conn.execute("SELECT * FROM imputation_accounts ORDER BY id")],
+            "link_types": [dict(r) for r in conn.execute("SELECT * FROM ado_link_types ORDER BY id")],
+        }
+
+
+def _upsert_rows(conn, table, rows):
+    if not rows:
+        return
+    columns = list(rows[0])
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != "id")
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+        f"ON CONFLICT(id) DO UPDATE SET {updates}",
+        [tuple(r[c] for c in columns) for r in rows],
+    )
+
+
+def apply_changes(db_path, changes):
+    """Replay the output of changes_since onto a restored copy of the database.
+
+    The copy must be at a change version between changes["from_version"] and
+    changes["to_version"]; returns False (and changes nothing) otherwise.
+    """
+    with get_connection(db_path, write=True) as conn:
+        version = _current_version(conn)
+        if not changes["from_version"] <= version <= changes["to_version"]:
+            return False
+        _upsert_rows(conn, "imputation_accounts", changes["accounts"])
+        _upsert_rows(conn, "ado_link_types", changes["link_types"])
+        conn.execute(
+            "DELETE FROM ado_link_types WHERE id NOT IN (SELECT value FROM json_each(?))",
+            (json.dumps([lt["id"] for lt in changes["link_types"]]),),
+        )
+        ids = [e["id"] for e in changes["entries"]] + changes["deleted"]
+        _restore_entries(conn, changes["entries"], ids)
+        conn.executemany("""
+            INSERT INTO entry_versions (entry_id, version) VALUES (?, ?)
+            ON CONFLICT(entry_id) DO UPDATE SET version = excluded.version
+        """, [(i, changes["to_version"]) for i in ids])
+        _set_meta(conn, change_version=changes["to_version"])
+        _touch(conn, *DATA_TABLES)
+        conn.commit()
+        return True
+
+
+def finish_restore(db_path):
+    """Prepare a replayed copy for use: drop the undo history, which no longer
+    matches it, and the backup bookkeeping, then rebuild the daily rollups."""
+    with get_connection(db_path, write=True) as conn:
+        conn.execute("DELETE FROM undo_log")
+        conn.execute(
+            "DELETE FROM app_meta WHERE key IN ('backup_version', 'backup_reference', 'backup_taken_at')"
+        )
+        _set_meta(conn, undo_head=0, undo_depth=0, redo_depth=0)
+        conn.commit()
+    check_rollups(db_path, repair=True)
 
 
 # --- ADO Link Types ---
 
 def list_link_types(db_path):
     with get_connection(db_path) as conn:
-        rows = conn.execute(
-            "SELECT * FROM ado_link_types ORDER BY position, id"
-        ).fetchall()
-        return [dict(r) for r in rows]
+        conn.execute("BEGIN")  # one read snapshot for the version and the rows
+        return [dict(lt) for lt in _reference(conn, "link_types").values()]
 
 
 def create_link_type(db_path, title, url_template=""):
-    with get_connection(db_path) as conn:
+    def job(conn):
         max_pos = conn.execute("SELECT COALESCE(MAX(position), -1) FROM ado_link_types").fetchone()[0]
         cur = conn.execute(
             "INSERT INTO ado_link_types (title, url_template, position) VALUES (?, ?, ?)",
             (title, url_template, max_pos + 1),
         )
+        _touch(conn, "link_types")
         conn.commit()
         row = conn.execute("SELECT * FROM ado_link_types WHERE id = ?", (cur.lastrowid,)).fetchone()
         return dict(row)
 
+    return _submit(db_path, job)
+
 
 def update_link_type(db_path, link_type_id, **fields):
-    with get_connection(db_path) as conn:
+    def job(conn):
         allowed = {"title", "url_template", "position"}
         updates = {k: v for k, v in fields.items() if k in allowed}
         if not updates:
@@ -911,12 +2506,23 @@ def update_link_type(db_path, link_type_id, **fields):
         set_clause = ", ".join(f"{k} = ?" for k in updates)
         values = list(updates.values()) + [link_type_id]
         conn.execute(f"UPDATE ado_link_types SET {set_clause} WHERE id = ?", values)
+        _touch(conn, "link_types")
         conn.commit()
         row = conn.execute("SELECT * FROM ado_link_types WHERE id = ?", (link_type_id,)).fetchone()
         return dict(row) if row else None
 
+    return _submit(db_path, job)
+
 
 def delete_link_type(db_path, link_type_id):
-    with get_connection(db_path) as conn:
+    def job(conn):
+        # The cascade drops these entries' ADO items: stamp them for the change feed
+        affected = [row[0] for row in conn.execute(
+            "SELECT DISTINCT entry_id FROM entry_ado_items WHERE link_type_id = ?",
+            (link_type_id,))]
+        _mark_changed(conn, affected)
         conn.execute("DELETE FROM ado_link_types WHERE id = ?", (link_type_id,))
+        _touch(conn, "link_types")
         conn.commit()
+
+    return _submit(db_path, job)
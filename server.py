@@ -1,21 +1,34 @@
 #!/usr/bin/env python3
 """Quokka - Work time tracker server."""
 
+import csv
 import datetime
+import email.utils
 import glob
+import gzip
+import hashlib
+import io
 import json
 import logging
 import os
 import re
 import shutil
+import stat
+import tempfile
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 
 import db
 
+try:
+    import brotli
+except ImportError:  # optional: gzip alone is served without it
+    brotli = None
+
 log = logging.getLogger("quokka")
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -31,15 +44,176 @@ MIME_TYPES = {
     ".png": "image/png",
     ".ico": "image/x-icon",
 }
+COMPRESSIBLE_TYPES = {".html", ".css", ".js", ".svg", ".json"}
+STATIC_CACHE_CONTROL = "no-cache"  # asset URLs are not versioned: always revalidate
+
+# Static files, loaded once and reloaded when their mtime or size changes:
+# path -> (mtime_ns, size, {"mime", "last_modified", "mtime", "variants"}),
+# where variants maps a content encoding to its (body, etag)
+_static_cache = {}
+
+
+def _load_static(filepath, st):
+    with open(filepath, "rb") as f:
+        content = f.read()
+    ext = os.path.splitext(filepath)[1]
+    digest = hashlib.sha1(content).hexdigest()[:16]
+    variants = {"identity": (content, f'"{digest}"')}
+    if ext in COMPRESSIBLE_TYPES:
+        compressed = {"gzip": gzip.compress(content, 9, mtime=0)}
+        if brotli is not None:
+            compressed["br"] = brotli.compress(content)
+        for encoding, body in compressed.items():
+            if len(body) < len(content):
+                variants[encoding] = (body, f'"{digest}-{encoding}"')
+    return {
+        "mime": MIME_TYPES.get(ext, "application/octet-stream"),
+        "last_modified": email.utils.formatdate(st.st_mtime, usegmt=True),
+        "mtime": int(st.st_mtime),
+        "variants": variants,
+    }
+
+
+def get_static(filepath):
+    """Return the cached static file at filepath, or None if it does not exist."""
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    cached = _static_cache.get(filepath)
+    if cached is None or cached[0] != st.st_mtime_ns or cached[1] != st.st_size:
+        cached = (st.st_mtime_ns, st.st_size, _load_static(filepath, st))
+        _static_cache[filepath] = cached
+    return cached[2]
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _etag_matches(header, variants):
+    if header.strip() == "*":
+        return True
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return any(etag.removeprefix("W/") in tags for _, etag in variants.values())
 
 
 def load_config():
+    if not os.path.exists(CONFIG_PATH):
+        return {}
     with open(CONFIG_PATH, "r") as f:
         return json.load(f)
 
 
 CONFIG = load_config()
 DB_PATH = os.path.join(BASE_DIR, CONFIG.get("database", "quokka.db"))
+MAX_IDS_PER_REQUEST = 500
+JSON_GZIP_MIN_BYTES = 1024
+JSON_GZIP_LEVEL = 5
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def _export_csv(rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(db.EXPORT_COLUMNS)
+    yield buf.getvalue().encode("utf-8")  # header goes out before the first row is read
+    buf.seek(0)
+    buf.truncate()
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= EXPORT_CHUNK_SIZE:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+def _export_ndjson(rows):
+    parts = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(db.EXPORT_COLUMNS, row))) + "\n"
+        parts.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield "".join(parts).encode("utf-8")
+            parts = []
+            size = 0
+    yield "".join(parts).encode("utf-8")
+
+
+EXPORT_FORMATS = {
+    "csv": (_export_csv, "text/csv; charset=utf-8"),
+    "ndjson": (_export_ndjson, "application/x-ndjson"),
+}
+
+
+def _import_csv(stream):
+    try:
+        yield from csv.DictReader(stream)
+    except csv.Error as e:
+        raise ValueError(f"malformed CSV: {e}")
+
+
+def _import_ndjson(stream):
+    for line in stream:
+        if line.strip():
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("each NDJSON line must be an object")
+            yield record
+
+
+IMPORT_FORMATS = {
+    "csv": _import_csv,
+    "ndjson": _import_ndjson,
+}
+
+# Seconds an upload may stall before the import request is dropped
+IMPORT_READ_TIMEOUT = 30
+
+
+def import_stream(db_path, binary_stream, fmt):
+    """Decode a CSV or NDJSON byte stream and import it with db.import_entries."""
+    text = io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
+    try:
+        return db.import_entries(db_path, IMPORT_FORMATS[fmt](text))
+    finally:
+        text.detach()  # leave the underlying stream open for the caller
+
+
+class _BodyStream(io.RawIOBase):
+    """Read-only view of the next `length` bytes of a request body."""
+
+    def __init__(self, rfile, length):
+        self.rfile = rfile
+        self.remaining = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.remaining <= 0:
+            return 0
+        data = self.rfile.read(min(len(buffer), self.remaining))
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
 
 
 class QuokkaHandler(BaseHTTPRequestHandler):
@@ -48,18 +222,59 @@ class QuokkaHandler(BaseHTTPRequestHandler):
     def log_message(self, format, *args):
         log.info(format % args)
 
-    def _send_json(self, data, status=200):
+    def _send_json(self, data, status=200, etag=None):
         body = json.dumps(data).encode("utf-8")
+        compress = len(body) >= JSON_GZIP_MIN_BYTES
+        if compress and "gzip" in _accepted_encodings(self.headers.get("Accept-Encoding")):
+            body = gzip.compress(body, JSON_GZIP_LEVEL, mtime=0)
+        else:
+            compress = False
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Vary", "Accept-Encoding")
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
         self.send_header("Content-Length", str(len(body)))
         self.end_headers()
         self.wfile.write(body)
 
+    def _check_etag(self, *tables):
+        """Return a weak ETag for the current version of tables, or None once
+        a 304 has been sent because the client's copy is still current."""
+        etag = f'W/"{db.data_version(DB_PATH, *tables)}"'
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None and _etag_matches(if_none_match, {"json": (None, etag)}):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return None
+        return etag
+
     def _send_error(self, status, message):
         log.warning("%s %s -> %d %s", self.command, self.path, status, message)
         self._send_json({"error": message}, status)
 
+    def _send_chunked(self, chunks, content_type, filename=None):
+        """Stream an iterable of byte strings using chunked transfer encoding."""
+        # Chunked encoding needs an HTTP/1.1 status line; the connection is
+        # still closed afterwards, as for every other response.
+        self.protocol_version = "HTTP/1.1"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        if filename:
+            self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        self.end_headers()
+        for chunk in chunks:
+            if chunk:
+                self.wfile.write(b"%X\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
     def _read_body(self):
         length = int(self.headers.get("Content-Length", 0))
         if length == 0:
@@ -68,15 +283,38 @@ class QuokkaHandler(BaseHTTPRequestHandler):
         return json.loads(raw)
 
     def _serve_static(self, filepath):
-        if not os.path.isfile(filepath):
+        static = get_static(filepath)
+        if static is None:
             self.send_error(404)
             return
-        ext = os.path.splitext(filepath)[1]
-        mime = MIME_TYPES.get(ext, "application/octet-stream")
-        with open(filepath, "rb") as f:
-            content = f.read()
-        self.send_response(200)
-        self.send_header("Content-Type", mime)
+        variants = static["variants"]
+        accepted = _accepted_encodings(self.headers.get("Accept-Encoding"))
+        encoding = next((e for e in ("br", "gzip") if e in variants and e in accepted), "identity")
+        content, etag = variants[encoding]
+
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, variants)
+        else:
+            since = self.headers.get("If-Modified-Since")
+            try:
+                since = email.utils.parsedate_to_datetime(since).timestamp() if since else None
+            except (TypeError, ValueError):
+                since = None
+            not_modified = since is not None and static["mtime"] <= since
+
+        self.send_response(304 if not_modified else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", static["last_modified"])
+        self.send_header("Cache-Control", STATIC_CACHE_CONTROL)
+        if len(variants) > 1:
+            self.send_header("Vary", "Accept-Encoding")
+        if not_modified:
+            self.end_headers()
+            return
+        self.send_header("Content-Type", static["mime"])
+        if encoding != "identity":
+            self.send_header("Content-Encoding", encoding)
         self.send_header("Content-Length", str(len(content)))
         self.end_headers()
         self.wfile.write(content)
@@ -92,22 +330,33 @@ class QuokkaHandler(BaseHTTPRequestHandler):
         elif path.startswith("/static/"):
             # Prevent directory traversal
             rel = path[len("/static/"):]
-            if ".." in rel:
+            filepath = os.path.normpath(os.path.join(STATIC_DIR, rel))
+            if ".." in rel or not filepath.startswith(STATIC_DIR + os.sep):
                 self.send_error(403)
                 return
-            self._serve_static(os.path.join(STATIC_DIR, rel))
+            self._serve_static(filepath)
         elif path == "/api/entries":
             self._handle_list_entries(parsed)
         elif path == "/api/accounts":
             self._handle_list_accounts()
         elif path == "/api/link-types":
             self._handle_list_link_types()
+        elif path == "/api/stats":
+            self._send_json({"entry_cache": db.entry_cache_stats(), "writer": db.writer_stats()})
         elif path == "/api/undo-status":
             self._send_json(db.undo_status(DB_PATH))
+        elif path == "/api/changes":
+            self._handle_list_changes(parsed)
+        elif path == "/api/search":
+            self._handle_search(parsed)
+        elif path == "/api/reports/imputations":
+            self._handle_imputation_report(parsed)
+        elif path == "/api/export":
+            self._handle_export(parsed)
         else:
             m = re.match(r"^/api/entries/(\d+)/suggest-links$", path)
             if m:
-                self._handle_suggest_links(int(m.group(1)))
+                self._handle_suggest_links(int(m.group(1)), parsed)
             else:
                 self.send_error(404)
 
@@ -157,6 +406,14 @@ class QuokkaHandler(BaseHTTPRequestHandler):
             self._handle_redo()
             return
 
+        if path == "/api/batch":
+            self._handle_batch()
+            return
+
+        if path == "/api/import":
+            self._handle_import()
+            return
+
         # Account routes
         m = re.match(r"^/api/accounts/(\d+)/delete$", path)
         if m:
@@ -192,27 +449,105 @@ class QuokkaHandler(BaseHTTPRequestHandler):
     # --- Entry handlers ---
 
     def _handle_list_entries(self, parsed):
+        # Entries embed account numbers and link type titles
+        etag = self._check_etag("entries", "accounts", "link_types")
+        if etag is None:
+            return
         qs = parse_qs(parsed.query)
+        ids = qs.get("ids", [None])[0]
+        if ids is not None:
+            try:
+                entry_ids = [int(i) for i in ids.split(",") if i]
+            except ValueError:
+                self._send_error(400, "Invalid ids")
+                return
+            if len(entry_ids) > MAX_IDS_PER_REQUEST:
+                self._send_error(400, f"At most {MAX_IDS_PER_REQUEST} ids per request")
+                return
+            self._send_json(db.get_entries(DB_PATH, entry_ids), etag=etag)
+            return
+        days = qs.get("days", [None])[0]
+        if days is not None:
+            cursor = qs.get("cursor", [None])[0]
+            try:
+                page = db.list_entries_page(DB_PATH, max(1, int(days)), cursor)
+            except ValueError:
+                self._send_error(400, "Invalid days or cursor")
+                return
+            self._send_json(page, etag=etag)
+            return
         date_from = qs.get("from", [None])[0]
         date_to = qs.get("to", [None])[0]
         entries = db.list_entries(DB_PATH, date_from, date_to)
-        self._send_json(entries)
+        self._send_json(entries, etag=etag)
+
+    def _handle_list_changes(self, parsed):
+        qs = parse_qs(parsed.query)
+        try:
+            since = int(qs.get("since", ["0"])[0])
+        except ValueError:
+            self._send_error(400, "since must be an integer")
+            return
+        self._send_json(db.list_changes(DB_PATH, since))
+
+    def _handle_imputation_report(self, parsed):
+        qs = parse_qs(parsed.query)
+        date_from = qs.get("from", [None])[0]
+        date_to = qs.get("to", [None])[0]
+        if not date_from or not date_to:
+            self._send_error(400, "from and to are required")
+            return
+        try:
+            report = db.imputation_report(DB_PATH, date_from, date_to, qs.get("group_by", ["day"])[0])
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+        self._send_json(report)
+
+    def _handle_export(self, parsed):
+        qs = parse_qs(parsed.query)
+        fmt = qs.get("format", ["csv"])[0]
+        if fmt not in EXPORT_FORMATS:
+            self._send_error(400, f"format must be one of {', '.join(EXPORT_FORMATS)}")
+            return
+        date_from = qs.get("from", [None])[0]
+        date_to = qs.get("to", [None])[0]
+        encode, content_type = EXPORT_FORMATS[fmt]
+        filename = f"quokka-{date_from or 'start'}-{date_to or 'end'}.{fmt}"
+        rows = db.iter_export_rows(DB_PATH, date_from, date_to)
+        try:
+            self._send_chunked(encode(rows), content_type, filename)
+        finally:
+            rows.close()  # returns the connection even if the client went away
+
+    def _handle_search(self, parsed):
+        qs = parse_qs(parsed.query)
+        q = qs.get("q", [""])[0]
+        try:
+            limit = max(1, min(MAX_IDS_PER_REQUEST, int(qs.get("limit", [db.SEARCH_LIMIT])[0])))
+            results = db.search_entries(
+                DB_PATH, q, limit, qs.get("cursor", [None])[0], qs.get("from", [None])[0]
+            )
+        except ValueError:
+            self._send_error(400, "Invalid limit or cursor")
+            return
+        self._send_json(results)
 
     def _handle_create_entry(self):
         data = self._read_body()
         if not data.get("date") or data.get("duration") is None:
             self._send_error(400, "date and duration are required")
             return
-        entry = db.create_entry(DB_PATH, data)
-        self._send_json(entry, 201)
+        result = db.create_entry(DB_PATH, data)
+        self._send_json(result, 201)
 
     def _handle_update_entry(self, entry_id):
         data = self._read_body()
-        entry = db.update_entry(DB_PATH, entry_id, data)
-        if entry is None:
+        result = db.update_entry(DB_PATH, entry_id, data)
+        if result is None:
             self._send_error(404, "Entry not found")
             return
-        self._send_json(entry)
+        self._send_json(result)
 
     def _handle_duplicate_entry(self, entry_id):
         data = self._read_body()
@@ -221,11 +556,11 @@ class QuokkaHandler(BaseHTTPRequestHandler):
             self._send_error(400, "date is required")
             return
         link = data.get("link", False)
-        entry = db.duplicate_entry(DB_PATH, entry_id, target_date, link=link)
-        if entry is None:
+        result = db.duplicate_entry(DB_PATH, entry_id, target_date, link=link)
+        if result is None:
             self._send_error(404, "Entry not found")
             return
-        self._send_json(entry, 201)
+        self._send_json(result, 201)
 
     def _handle_reorder_entry(self, entry_id):
         data = self._read_body()
@@ -237,8 +572,8 @@ class QuokkaHandler(BaseHTTPRequestHandler):
         self._send_json(result)
 
     def _handle_delete_entry(self, entry_id):
-        db.delete_entry(DB_PATH, entry_id)
-        self._send_json({"ok": True})
+        result = db.delete_entry(DB_PATH, entry_id)
+        self._send_json(result or {"ok": True})
 
     # --- Undo/Redo handlers ---
 
@@ -250,11 +585,64 @@ class QuokkaHandler(BaseHTTPRequestHandler):
         result = db.perform_redo(DB_PATH)
         self._send_json(result)
 
+    def _handle_batch(self):
+        data = self._read_body()
+        operations = data.get("operations")
+        if not isinstance(operations, list) or not operations:
+            self._send_error(400, "operations must be a non-empty list")
+            return
+        result = db.perform_batch(DB_PATH, operations)
+        if not result["ok"]:
+            self._send_error(400, f"Operation {result['index']} failed: {result['reason']}")
+            return
+        self._send_json(result)
+
+    def _spool_body(self, length):
+        """Copy the request body to a temporary file, so a slow upload is read
+        off the socket before the import reaches the writer."""
+        spool = tempfile.TemporaryFile()
+        self.connection.settimeout(IMPORT_READ_TIMEOUT)
+        try:
+            shutil.copyfileobj(_BodyStream(self.rfile, length), spool)
+        except BaseException:
+            spool.close()
+            raise
+        finally:
+            self.connection.settimeout(None)
+        spool.seek(0)
+        return spool
+
+    def _handle_import(self):
+        qs = parse_qs(urlparse(self.path).query)
+        content_type = self.headers.get("Content-Type", "")
+        default = "ndjson" if "ndjson" in content_type else "csv"
+        fmt = qs.get("format", [default])[0]
+        if fmt not in IMPORT_FORMATS:
+            self._send_error(400, f"format must be one of {', '.join(IMPORT_FORMATS)}")
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = self._spool_body(length)
+        except TimeoutError:
+            self._send_error(408, "Timed out reading the request body")
+            return
+        with body:
+            if os.fstat(body.fileno()).st_size != length:
+                self._send_error(400, "Incomplete request body")
+                return
+            result = import_stream(DB_PATH, body, fmt)
+        if not result["ok"]:
+            self._send_error(400, f"Row {result['line']}: {result['error']}")
+            return
+        log.info("Imported %d rows (%d entries) at %d rows/s",
+                 result["rows"], result["entries"], result["rows_per_second"])
+        self._send_json(result)
+
     # --- Grouping handlers ---
 
     def _handle_ungroup_entry(self, entry_id):
-        db.ungroup_entry(DB_PATH, entry_id)
-        self._send_json({"ok": True})
+        result = db.ungroup_entry(DB_PATH, entry_id)
+        self._send_json(result or {"ok": True})
 
     def _handle_link_entry(self, entry_id):
         data = self._read_body()
@@ -263,21 +651,31 @@ class QuokkaHandler(BaseHTTPRequestHandler):
             self._send_error(400, "target_entry_id is required")
             return
         resolution = data.get("resolution")
-        entry = db.link_entries(DB_PATH, entry_id, target_entry_id, resolution)
-        if entry is None:
+        result = db.link_entries(DB_PATH, entry_id, target_entry_id, resolution)
+        if result is None:
             self._send_error(404, "Entry not found")
             return
-        self._send_json(entry)
+        self._send_json(result)
 
-    def _handle_suggest_links(self, entry_id):
-        suggestions = db.suggest_groups(DB_PATH, entry_id)
+    def _handle_suggest_links(self, entry_id, parsed):
+        qs = parse_qs(parsed.query)
+        q = qs.get("q", [""])[0].strip()
+        try:
+            limit = max(1, min(200, int(qs.get("limit", [db.SUGGEST_LIMIT])[0])))
+            suggestions = db.suggest_groups(DB_PATH, entry_id, q or None, limit, qs.get("cursor", [None])[0])
+        except ValueError:
+            self._send_error(400, "Invalid limit or cursor")
+            return
         self._send_json(suggestions)
 
     # --- Account handlers ---
 
     def _handle_list_accounts(self):
+        etag = self._check_etag("accounts")
+        if etag is None:
+            return
         accounts = db.list_accounts(DB_PATH)
-        self._send_json(accounts)
+        self._send_json(accounts, etag=etag)
 
     def _handle_create_account(self):
         data = self._read_body()
@@ -310,8 +708,11 @@ class QuokkaHandler(BaseHTTPRequestHandler):
     # --- Link type handlers ---
 
     def _handle_list_link_types(self):
+        etag = self._check_etag("link_types")
+        if etag is None:
+            return
         link_types = db.list_link_types(DB_PATH)
-        self._send_json(link_types)
+        self._send_json(link_types, etag=etag)
 
     def _handle_create_link_type(self):
         data = self._read_body()
@@ -333,26 +734,221 @@ class QuokkaHandler(BaseHTTPRequestHandler):
         self._send_json({"ok": True})
 
 
-def backup_db(db_path, max_backups=10):
-    """Create a daily backup of the DB file, keeping at most max_backups."""
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that dispatches each request to a bounded pool of worker threads.
+
+    At most `max_queued` accepted connections wait for a free worker; past
+    that a connection is answered 503 and closed at once, so a burst of slow
+    clients can't pile up sockets without limit.
+    """
+
+    request_queue_size = 64
+    max_queued = 64
+
+    def __init__(self, server_address, handler_class, workers=8):
+        super().__init__(server_address, handler_class)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quokka-worker")
+        self._slots = threading.BoundedSemaphore(workers + self.max_queued)
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            log.warning("Refusing %s:%d: %d requests already pending",
+                        *client_address[:2], self.max_queued)
+            self._refuse(request)
+            return
+        try:
+            self._pool.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:  # the pool is shutting down
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _refuse(self, request):
+        try:
+            request.setblocking(False)  # never wait on the client from the accept loop
+            request.send(b"HTTP/1.0 503 Service Unavailable\r\nRetry-After: 1\r\n"
+                         b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
+def create_server(port, mode="threaded", workers=8):
+    """Build the HTTP server for the configured serving mode ("threaded" or "single")."""
+    if mode == "single":
+        return HTTPServer(("127.0.0.1", port), QuokkaHandler)
+    if mode != "threaded":
+        raise ValueError(f"Unknown server_mode: {mode!r}")
+    return PooledHTTPServer(("127.0.0.1", port), QuokkaHandler, workers=max(1, int(workers)))
+
+
+_backup_lock = threading.Lock()
+INCREMENT_NAME_RE = re.compile(r"_(\d{8}-\d{6})_v(\d+)-(\d+)\.json\.gz$")
+
+
+def _backup_paths(db_path):
+    """Return (backup dir, increments dir, database name) for db_path."""
     backup_dir = os.path.join(os.path.dirname(db_path), "db_backups")
+    db_name = os.path.splitext(os.path.basename(db_path))[0]
+    return backup_dir, os.path.join(backup_dir, "increments"), db_name
+
+
+def _full_backups(backup_dir, db_name):
+    """Return [(date, path)] of the full backups, oldest first."""
+    backups = []
+    for path in glob.glob(os.path.join(backup_dir, f"{db_name}_*.db*")):
+        m = re.search(r"_(\d{4}-\d{2}-\d{2})\.db(\.gz)?$", path)
+        if m:
+            backups.append((m.group(1), path))
+    return sorted(backups)
+
+
+def _increments(increments_dir, db_name):
+    """Return [(taken at, from version, to version, path)] of the incremental backups."""
+    increments = []
+    for path in glob.glob(os.path.join(increments_dir, f"{db_name}_*.json.gz")):
+        m = INCREMENT_NAME_RE.search(path)
+        if m:
+            taken_at = datetime.datetime.strptime(m.group(1), "%Y%m%d-%H%M%S")
+            increments.append((taken_at, int(m.group(2)), int(m.group(3)), path))
+    return sorted(increments, key=lambda i: (i[2], i[0]))
+
+
+def backup_db(db_path, max_backups=10):
+    """Create a daily gzipped backup of the DB, keeping at most max_backups."""
+    with _backup_lock:
+        _backup_db(db_path, max_backups)
+
+
+def _backup_db(db_path, max_backups):
+    backup_dir, increments_dir, db_name = _backup_paths(db_path)
     os.makedirs(backup_dir, exist_ok=True)
     today = date.today().isoformat()
-    db_name = os.path.splitext(os.path.basename(db_path))[0]
-    backup_path = os.path.join(backup_dir, f"{db_name}_{today}.db")
-    if os.path.exists(backup_path):
-        log.info("Today's backup already exists: %s", backup_path)
-        return
+    backup_path = os.path.join(backup_dir, f"{db_name}_{today}.db.gz")
+    # Backups from before compression are plain .db files
+    for existing in (backup_path, backup_path[:-len(".gz")]):
+        if os.path.exists(existing):
+            log.info("Today's backup already exists: %s", existing)
+            return
     if not os.path.exists(db_path):
         return
-    shutil.copy2(db_path, backup_path)
-    log.info("Created DB backup: %s", backup_path)
-    # Prune old backups
-    backups = sorted(glob.glob(os.path.join(backup_dir, f"{db_name}_*.db")))
+    started = time.perf_counter()
+    tmp_path = backup_path[:-len(".gz")] + ".tmp"
+    try:
+        result = db.backup(db_path, tmp_path)
+        if result["integrity"] != "ok":
+            log.error("DB backup failed integrity check, not kept: %s", result["integrity"])
+            return
+        with open(tmp_path, "rb") as src, gzip.open(backup_path + ".tmp", "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(backup_path + ".tmp", backup_path)
+        size = os.path.getsize(tmp_path)
+    finally:
+        for leftover in (tmp_path, backup_path + ".tmp"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    log.info(
+        "Created DB backup: %s (%.1f MB -> %.1f MB gzipped, %.2fs)", backup_path,
+        size / 1e6, os.path.getsize(backup_path) / 1e6, time.perf_counter() - started,
+    )
+    if result["version"] is not None:
+        # Increments from here on are relative to this backup
+        db.set_backup_mark(db_path, result["version"], result["reference"])
+    # Prune old backups, and the increments only they could be replayed onto
+    backups = _full_backups(backup_dir, db_name)
     while len(backups) > max_backups:
-        old = backups.pop(0)
+        _, old = backups.pop(0)
         os.remove(old)
         log.info("Removed old backup: %s", old)
+    oldest = datetime.datetime.fromisoformat(backups[0][0])
+    for taken_at, _, _, path in _increments(increments_dir, db_name):
+        if taken_at < oldest:
+            os.remove(path)
+
+
+def incremental_backup(db_path):
+    """Save what changed since the last full or incremental backup, if anything,
+    to db_backups/increments. Returns the path written, or None."""
+    with _backup_lock:
+        mark = db.backup_mark(db_path)
+        if mark is None:
+            return None  # nothing to build on until the next full backup
+        started = time.perf_counter()
+        changes = db.changes_since(db_path, mark[0])
+        if (changes["to_version"], changes["reference"]) == mark:
+            return None
+        _, increments_dir, db_name = _backup_paths(db_path)
+        os.makedirs(increments_dir, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(
+            increments_dir, f"{db_name}_{stamp}_v{changes['from_version']}-{changes['to_version']}.json.gz"
+        )
+        with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+            json.dump(changes, f, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+        db.set_backup_mark(db_path, changes["to_version"], changes["reference"])
+    log.info(
+        "Created incremental backup: %s (%d changed, %d deleted, %.1f KB, %.2fs)", path,
+        len(changes["entries"]), len(changes["deleted"]), os.path.getsize(path) / 1e3,
+        time.perf_counter() - started,
+    )
+    return path
+
+
+def restore_backup(db_path, output_path, at=None):
+    """Rebuild db_path as of datetime `at` (default: the latest backup) into
+    output_path, from the newest full backup taken by then plus its increments.
+
+    Returns {"full", "increments", "version"}; raises ValueError when no full
+    backup is old enough or the increments have a gap.
+    """
+    if os.path.exists(output_path):
+        raise ValueError(f"{output_path} already exists")
+    backup_dir, increments_dir, db_name = _backup_paths(db_path)
+    at_ts = at.timestamp() if at else float("inf")
+    for day, full in reversed(_full_backups(backup_dir, db_name)):
+        if at and day > at.date().isoformat():
+            continue
+        opener = gzip.open if full.endswith(".gz") else open
+        with opener(full, "rb") as src, open(output_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        db.init_db(output_path)
+        with db.get_connection(output_path) as conn:
+            row = conn.execute("SELECT value FROM app_meta WHERE key = 'backup_taken_at'").fetchone()
+        # Backups from before this was recorded count as taken at midnight
+        full_ts = row[0] if row else datetime.datetime.fromisoformat(day).timestamp()
+        if full_ts <= at_ts:
+            break
+        db.close_all()
+        os.remove(output_path)
+    else:
+        raise ValueError("no full backup was taken by then")
+    version = db.change_version(output_path)
+    applied = 0
+    for taken_at, _, to_version, path in _increments(increments_dir, db_name):
+        # Same-version increments still carry account and link type changes
+        if to_version < version or not full_ts <= taken_at.timestamp() <= at_ts:
+            continue
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            changes = json.load(f)
+        if not db.apply_changes(output_path, changes):
+            raise ValueError(f"increments are missing between versions {version} and {changes['from_version']}")
+        version = to_version
+        applied += 1
+    db.finish_restore(output_path)
+    return {"full": full, "increments": applied, "version": version}
 
 
 def _backup_scheduler(db_path):
@@ -373,6 +969,16 @@ def _backup_scheduler(db_path):
             log.exception("DB backup failed")
 
 
+def _incremental_backup_scheduler(db_path, minutes):
+    log.info("Incremental backups every %d minutes", minutes)
+    while True:
+        time.sleep(minutes * 60)
+        try:
+            incremental_backup(db_path)
+        except Exception:
+            log.exception("Incremental DB backup failed")
+
+
 def main():
     log_format = "%(asctime)s [%(levelname)s] %(message)s"
     log_datefmt = "%Y-%m-%d %H:%M:%S"
@@ -387,13 +993,29 @@ def main():
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(logging.Formatter(log_format, datefmt=log_datefmt))
     logging.getLogger().addHandler(file_handler)
+    db.configure(
+        pool_size=CONFIG.get("db_pool_size"),
+        pragmas=CONFIG.get("db_pragmas"),
+        undo_stack_limit=CONFIG.get("undo_stack_limit"),
+        entry_cache_size=CONFIG.get("entry_cache_size"),
+        writer_batch=CONFIG.get("writer_batch"),
+    )
     backup_db(DB_PATH)
     t = threading.Thread(target=_backup_scheduler, args=(DB_PATH,), daemon=True)
     t.start()
     log.info("Initializing database at %s", DB_PATH)
     db.init_db(DB_PATH)
+    increment_minutes = CONFIG.get("incremental_backup_minutes", 5)
+    if increment_minutes:
+        threading.Thread(
+            target=_incremental_backup_scheduler, args=(DB_PATH, increment_minutes), daemon=True,
+        ).start()
     port = CONFIG.get("port", 8080)
-    server = HTTPServer(("127.0.0.1", port), QuokkaHandler)
+    mode = CONFIG.get("server_mode", "threaded")
+    workers = CONFIG.get("workers", 8)
+    server = create_server(port, mode, workers)
+    if mode == "threaded":
+        log.info("Serving with a pool of %d worker threads", workers)
     log.info("Quokka running on http://localhost:%d", port)
     try:
         server.serve_forever()
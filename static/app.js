@@ -3,9 +3,19 @@
 
     // --- State ---
     var entries = [];
+    var entriesVersion = 0;     // server change version the entries array reflects
+    var nextCursor = null;      // cursor of the next (older) page, null when all loaded
+    var windowLoaded = false;   // true once the first page of entries is in memory
+    var loadingOlder = false;
+    var historyTotal = 0;       // summed duration of every entry, from the server's daily rollups
+    var PAGE_DAYS = 30;
     var accounts = [];
     var linkTypes = [];
     var filterTerm = "";
+    var searchEntries = null;   // server matches for filterTerm, shown instead of entries
+    var searchCursor = null;    // cursor of the next page of matches
+    var searchTimer = null;
+    var SEARCH_PAGE = 100;
     var dropBeforeId = null;  // entry id to drop before (null = end of day)
     var dropIndicatorEl = null; // singleton indicator <tr>
     var DAY_NAMES = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"];
@@ -192,12 +202,15 @@
         }
     }
 
-    function api(method, path, body) {
+    function api(method, path, body, quiet) {
         var opts = { method: method, headers: {} };
         if (body !== undefined) {
             opts.headers["Content-Type"] = "application/json";
             opts.body = JSON.stringify(body);
         }
+        if (quiet) {
+            return fetch(path, opts).then(function (r) { return r.json(); });
+        }
         showLoading();
         return fetch(path, opts)
             .then(function (r) { return r.json(); })
@@ -206,13 +219,113 @@
     }
 
     // --- Load data ---
+    function oldestLoadedDate() {
+        return entries.length ? entries[entries.length - 1].date : null;
+    }
+
     function loadEntries() {
-        return api("GET", "/api/entries")
-            .then(function (data) {
-                entries = data;
-                renderDays();
-                updateUndoButtons();
-            });
+        // First load fetches the newest page; afterwards only changes are pulled.
+        if (windowLoaded) return syncChanges();
+        return api("GET", "/api/entries?days=" + PAGE_DAYS).then(function (page) {
+            windowLoaded = true;
+            nextCursor = page.next_cursor;
+            entriesVersion = page.version;
+            historyTotal = page.total;
+            entries = page.entries;
+            renderDays();
+            updateUndoButtons();
+            fillViewport();
+        });
+    }
+
+    function reloadEntries() {
+        windowLoaded = false;
+        nextCursor = null;
+        entries = [];
+        return loadEntries();
+    }
+
+    function syncChanges() {
+        return api("GET", "/api/changes?since=" + entriesVersion).then(function (data) {
+            applyChanges(data.entries, data.deleted);
+            entriesVersion = data.version;
+            historyTotal = data.total;
+            renderDays();
+            updateUndoButtons();
+        });
+    }
+
+    // Apply the delta returned by a mutation endpoint (changed entries + deleted IDs).
+    function applyDelta(result) {
+        if (!result || result.version == null) return syncChanges();
+        // A version jump means another tab changed something in between
+        var missed = result.version > entriesVersion + 1;
+        applyChanges(result.changed || [], result.deleted || []);
+        if (missed) return syncChanges();
+        entriesVersion = Math.max(entriesVersion, result.version);
+        if (result.total != null) historyTotal = result.total;
+        renderDays();
+        if (result.undo) setUndoButtons(result.undo);
+        else updateUndoButtons();
+        return Promise.resolve();
+    }
+
+    function compareEntries(a, b) {
+        if (a.date !== b.date) return a.date < b.date ? 1 : -1;
+        var sa = a.sort_order != null ? a.sort_order : a.id;
+        var sb = b.sort_order != null ? b.sort_order : b.id;
+        if (sa !== sb) return sa - sb;
+        return a.id - b.id;
+    }
+
+    // Patch the in-memory entries with changed/deleted rows from the server.
+    function applyChanges(changed, deleted) {
+        var oldest = oldestLoadedDate();
+        var drop = {};
+        for (var i = 0; i < deleted.length; i++) drop[deleted[i]] = true;
+        for (var j = 0; j < changed.length; j++) drop[changed[j].id] = true;
+        entries = entries.filter(function (e) { return !drop[e.id]; });
+        for (var k = 0; k < changed.length; k++) {
+            // Days older than the loaded window arrive with their page later
+            if (!nextCursor || !oldest || changed[k].date >= oldest) entries.push(changed[k]);
+        }
+        entries.sort(compareEntries);
+        if (searchEntries) {
+            // Keep shown matches current; new matches appear on the next search
+            var byId = {};
+            for (var m = 0; m < changed.length; m++) byId[changed[m].id] = changed[m];
+            searchEntries = searchEntries
+                .filter(function (e) { return deleted.indexOf(e.id) < 0; })
+                .map(function (e) { return byId[e.id] || e; })
+                .sort(compareEntries);
+        }
+    }
+
+    function loadOlderEntries() {
+        if (!nextCursor || loadingOlder) return Promise.resolve();
+        loadingOlder = true;
+        var url = "/api/entries?days=" + PAGE_DAYS + "&cursor=" + encodeURIComponent(nextCursor);
+        return api("GET", url, undefined, true).then(function (page) {
+            loadingOlder = false;
+            nextCursor = page.next_cursor;
+            entries = entries.concat(page.entries);
+            renderDays();
+            fillViewport();
+        }, function (err) {
+            loadingOlder = false;
+            throw err;
+        });
+    }
+
+    function nearBottom() {
+        return window.innerHeight + window.scrollY >= document.body.offsetHeight - 600;
+    }
+
+    // Keep loading older days until the page is scrollable (or history runs out)
+    function fillViewport() {
+        if (nextCursor && !filterTerm && nearBottom() && !document.getElementById("view-entries").classList.contains("hidden")) {
+            loadOlderEntries();
+        }
     }
 
     function loadAccounts() {
@@ -237,21 +350,56 @@
     }
 
     // --- Search filter ---
-    function matchesSearch(entry, lower) {
-        if (!lower) return true;
-        if ((entry.description || "").toLowerCase().indexOf(lower) >= 0) return true;
-        if ((entry.notes || "").toLowerCase().indexOf(lower) >= 0) return true;
-        var adoItems = entry.ado_items || [];
-        for (var ai = 0; ai < adoItems.length; ai++) {
-            if ((adoItems[ai].value || "").toLowerCase().indexOf(lower) >= 0) return true;
+    // Matching runs on the server over the whole history, not just the loaded days.
+    function searchIds(term, cursor, limit, dateFrom) {
+        var url = "/api/search?q=" + encodeURIComponent(term) + "&limit=" + limit;
+        if (cursor) url += "&cursor=" + encodeURIComponent(cursor);
+        if (dateFrom) url += "&from=" + encodeURIComponent(dateFrom);
+        return api("GET", url, undefined, true);
+    }
+
+    function runSearch(more) {
+        var term = filterTerm;
+        return searchIds(term, more ? searchCursor : null, SEARCH_PAGE).then(function (page) {
+            var ids = page.results.map(function (r) { return r.id; });
+            var fetched = ids.length
+                ? api("GET", "/api/entries?ids=" + ids.join(","), undefined, true)
+                : Promise.resolve([]);
+            return fetched.then(function (found) {
+                if (term !== filterTerm) return; // superseded by a newer term
+                searchEntries = (more && searchEntries ? searchEntries.concat(found) : found).sort(compareEntries);
+                searchCursor = page.next_cursor;
+                renderDays();
+            });
+        });
+    }
+
+    function setFilter(term) {
+        filterTerm = term;
+        clearTimeout(searchTimer);
+        if (!term) {
+            searchEntries = null;
+            searchCursor = null;
+            renderDays();
+            return;
         }
-        return false;
+        searchTimer = setTimeout(function () { runSearch(false); }, 200);
+    }
+
+    function makeMoreResults() {
+        var btn = document.createElement("button");
+        btn.className = "btn-more-results";
+        btn.textContent = "Show more results";
+        btn.onclick = function () { runSearch(true); };
+        return btn;
     }
 
     // --- Find (jump-to-match) ---
     var findTerm = "";
     var findMatches = []; // ordered entry IDs
     var findIdx = -1;
+    var findTimer = null;
+    var FIND_LIMIT = 500;
 
     function openFindBar() {
         document.getElementById("find-bar").classList.remove("hidden");
@@ -309,19 +457,31 @@
     }
 
     function updateFind() {
-        findTerm = document.getElementById("find-input").value;
-        var lower = findTerm.toLowerCase();
-        findMatches = [];
-        findIdx = -1;
-        if (lower) {
-            for (var i = 0; i < entries.length; i++) {
-                if (matchesSearch(entries[i], lower)) findMatches.push(entries[i].id);
-            }
-            if (findMatches.length > 0) findIdx = 0;
+        var term = document.getElementById("find-input").value;
+        findTerm = term;
+        clearTimeout(findTimer);
+        if (!term) {
+            findMatches = [];
+            findIdx = -1;
+            applyFindHighlights();
+            updateFindCounter();
+            return;
         }
-        applyFindHighlights();
-        updateFindCounter();
-        scrollToCurrentMatch();
+        findTimer = setTimeout(function () {
+            // Only rows on screen can be jumped to, so limit the search to the loaded days
+            var shown = filterTerm ? (searchEntries || []) : entries;
+            var from = filterTerm || !nextCursor ? null : oldestLoadedDate();
+            searchIds(term, null, FIND_LIMIT, from).then(function (page) {
+                if (term !== findTerm) return;
+                var hit = {};
+                for (var i = 0; i < page.results.length; i++) hit[page.results[i].id] = true;
+                findMatches = shown.filter(function (e) { return hit[e.id]; }).map(function (e) { return e.id; });
+                findIdx = findMatches.length > 0 ? 0 : -1;
+                applyFindHighlights();
+                updateFindCounter();
+                scrollToCurrentMatch();
+            });
+        }, 200);
     }
 
     function findNext() {
@@ -360,8 +520,7 @@
     function renderDays() {
         var container = document.getElementById("days-container");
         container.innerHTML = "";
-        var lower = filterTerm.toLowerCase();
-        var filtered = lower ? entries.filter(function (e) { return matchesSearch(e, lower); }) : entries;
+        var filtered = filterTerm ? (searchEntries || []) : entries;
         var groups = groupByDate(filtered);
         var grandTotal = 0;
 
@@ -379,11 +538,13 @@
         }
 
         // Empty placeholder for today if no entries exist (skip when filtering)
-        if (!hasTodayGroup && !lower) {
+        if (!hasTodayGroup && !filterTerm) {
             container.insertBefore(makeTodayPlaceholder(todayStr), container.firstChild);
         }
+        if (filterTerm && searchCursor) container.appendChild(makeMoreResults());
 
-        document.getElementById("total-label").textContent = "Total: " + fmtDuration(grandTotal);
+        // Only the newest days are loaded, so the unfiltered total comes from the server
+        document.getElementById("total-label").textContent = "Total: " + fmtDuration(filterTerm ? grandTotal : historyTotal);
         applyFindHighlights();
     }
 
@@ -414,7 +575,7 @@
         addDayBtn.textContent = "+";
         addDayBtn.title = "Add entry this day";
         addDayBtn.onclick = function () {
-            api("POST", "/api/entries", { date: group.date, duration: 0 }).then(loadEntries);
+            api("POST", "/api/entries", { date: group.date, duration: 0 }).then(applyDelta);
         };
         rightSpan.appendChild(addDayBtn);
         rightSpan.appendChild(totalSpan);
@@ -523,7 +684,7 @@
         addDayBtn.textContent = "+";
         addDayBtn.title = "Add entry for today";
         addDayBtn.onclick = function () {
-            api("POST", "/api/entries", { date: todayStr, duration: 0 }).then(loadEntries);
+            api("POST", "/api/entries", { date: todayStr, duration: 0 }).then(applyDelta);
         };
         rightSpan.appendChild(addDayBtn);
         hdr.appendChild(dateSpan);
@@ -575,13 +736,12 @@
         moveBtn.textContent = sameDay ? "Reorder here" : "Move here";
         moveBtn.onclick = function () {
             if (sameDay) {
-                api("POST", "/api/entries/" + entryId + "/reorder", { before_id: beforeId }).then(loadEntries);
+                api("POST", "/api/entries/" + entryId + "/reorder", { before_id: beforeId }).then(applyDelta);
             } else {
-                api("POST", "/api/entries/" + entryId, { date: targetDate })
-                    .then(function () {
-                        return api("POST", "/api/entries/" + entryId + "/reorder", { before_id: beforeId });
-                    })
-                    .then(loadEntries);
+                api("POST", "/api/batch", { operations: [
+                    { op: "update", id: entryId, data: { date: targetDate } },
+                    { op: "reorder", id: entryId, before_id: beforeId }
+                ] }).then(applyDelta);
             }
             closeDropMenu();
         };
@@ -590,7 +750,7 @@
         var dupBtn = document.createElement("button");
         dupBtn.textContent = "Duplicate here";
         dupBtn.onclick = function () {
-            api("POST", "/api/entries/" + entryId + "/duplicate", { date: targetDate }).then(loadEntries);
+            api("POST", "/api/entries/" + entryId + "/duplicate", { date: targetDate }).then(applyDelta);
             closeDropMenu();
         };
         menu.appendChild(dupBtn);
@@ -598,7 +758,7 @@
         var dupLinkBtn = document.createElement("button");
         dupLinkBtn.textContent = "Duplicate & link";
         dupLinkBtn.onclick = function () {
-            api("POST", "/api/entries/" + entryId + "/duplicate", { date: targetDate, link: true }).then(loadEntries);
+            api("POST", "/api/entries/" + entryId + "/duplicate", { date: targetDate, link: true }).then(applyDelta);
             closeDropMenu();
         };
         menu.appendChild(dupLinkBtn);
@@ -679,7 +839,7 @@
         delItem.onclick = function () {
             closeDropMenu();
             if (confirm("Delete this entry?")) {
-                api("POST", "/api/entries/" + entry.id + "/delete").then(loadEntries);
+                api("POST", "/api/entries/" + entry.id + "/delete").then(applyDelta);
             }
         };
         menu.appendChild(delItem);
@@ -842,7 +1002,7 @@
 
         function done() {
             if (input.value && input.value !== entry.date) {
-                api("POST", "/api/entries/" + entry.id, { date: input.value }).then(loadEntries);
+                api("POST", "/api/entries/" + entry.id, { date: input.value }).then(applyDelta);
             } else {
                 input.remove();
             }
@@ -933,7 +1093,7 @@
                 data[field] = val;
             }
 
-            api("POST", "/api/entries/" + entry.id, data).then(loadEntries);
+            api("POST", "/api/entries/" + entry.id, data).then(applyDelta);
         }
 
         input.onblur = function () {
@@ -989,9 +1149,9 @@
 
         document.getElementById("notes-save").onclick = function () {
             api("POST", "/api/entries/" + entry.id, { notes: textarea.value })
-                .then(function () {
+                .then(function (result) {
                     popup.classList.add("hidden");
-                    loadEntries();
+                    applyDelta(result);
                 });
         };
         document.getElementById("notes-cancel").onclick = function () {
@@ -1001,7 +1161,7 @@
 
     // --- Splits (inline chips) ---
     function saveSplits(entry, splits) {
-        return api("POST", "/api/entries/" + entry.id, { splits: splits }).then(loadEntries);
+        return api("POST", "/api/entries/" + entry.id, { splits: splits }).then(applyDelta);
     }
 
     function renderSplitsChips(td, entry) {
@@ -1166,7 +1326,7 @@
 
     // --- ADO Items (inline chips) ---
     function saveAdoItems(entry, items) {
-        return api("POST", "/api/entries/" + entry.id, { ado_items: items }).then(loadEntries);
+        return api("POST", "/api/entries/" + entry.id, { ado_items: items }).then(applyDelta);
     }
 
     function renderAdoItemsChips(td, entry) {
@@ -1358,9 +1518,7 @@
     // --- Add entry ---
     function addEntryToday() {
         var today = fmtDate(new Date());
-        api("POST", "/api/entries", { date: today, duration: 0 }).then(function () {
-            loadEntries().then(scrollToToday);
-        });
+        api("POST", "/api/entries", { date: today, duration: 0 }).then(applyDelta).then(scrollToToday);
     }
 
     function addEntryForDate() {
@@ -1378,11 +1536,9 @@
             var date = input.value;
             input.remove();
             if (date) {
-                api("POST", "/api/entries", { date: date, duration: 0 }).then(function () {
-                    loadEntries().then(function () {
-                        var group = document.querySelector('.day-group[data-date="' + date + '"]');
-                        if (group) group.scrollIntoView({ behavior: "smooth", block: "start" });
-                    });
+                api("POST", "/api/entries", { date: date, duration: 0 }).then(applyDelta).then(function () {
+                    var group = document.querySelector('.day-group[data-date="' + date + '"]');
+                    if (group) group.scrollIntoView({ behavior: "smooth", block: "start" });
                 });
             }
         }
@@ -1397,6 +1553,8 @@
     function switchView(view) {
         if (view !== "entries") {
             filterTerm = "";
+            searchEntries = null;
+            searchCursor = null;
             document.getElementById("filter-entries").value = "";
             closeFindBar();
         }
@@ -1410,7 +1568,7 @@
         document.getElementById("toolbar-ado-links").classList.toggle("hidden", view !== "ado-links");
         document.getElementById("view-select").value = view;
         if (view === "accounts") renderAccounts();
-        if (view === "entries") loadEntries();
+        if (view === "entries") reloadEntries();
         if (view === "imputations") renderImputationReport();
         if (view === "ado-links") renderLinkTypes();
     }
@@ -1733,9 +1891,9 @@
         var ungroupBtn = document.createElement("button");
         ungroupBtn.textContent = "Ungroup this entry";
         ungroupBtn.onclick = function () {
-            api("POST", "/api/entries/" + entry.id + "/ungroup").then(function () {
+            api("POST", "/api/entries/" + entry.id + "/ungroup").then(function (result) {
                 closeGroupPopup();
-                loadEntries();
+                applyDelta(result);
             });
         };
         popup.appendChild(ungroupBtn);
@@ -1766,18 +1924,35 @@
     var groupingSourceEntry = null;
     var groupingSuggestions = [];
     var groupingSelectedId = null;
+    var groupingCursor = null;
+    var groupingQuery = "";
+    var groupingTimer = null;
 
     function openGroupingModal(entry) {
         groupingSourceEntry = entry;
         groupingSelectedId = null;
+        groupingQuery = "";
         document.getElementById("grouping-modal").classList.remove("hidden");
         document.getElementById("grouping-filter").value = "";
         document.getElementById("conflict-section").classList.add("hidden");
         document.getElementById("grouping-suggestions").innerHTML = '<div style="padding:10px;color:var(--muted)">Loading...</div>';
-
-        api("GET", "/api/entries/" + entry.id + "/suggest-links").then(function (data) {
-            groupingSuggestions = data;
-            renderGroupingSuggestions("");
+        fetchGroupingSuggestions(false);
+    }
+
+    // The server ranks and filters suggestions; `more` appends the next page
+    function fetchGroupingSuggestions(more) {
+        var source = groupingSourceEntry;
+        var query = groupingQuery;
+        var params = [];
+        if (query) params.push("q=" + encodeURIComponent(query));
+        if (more && groupingCursor) params.push("cursor=" + encodeURIComponent(groupingCursor));
+        var url = "/api/entries/" + source.id + "/suggest-links" + (params.length ? "?" + params.join("&") : "");
+        return api("GET", url, undefined, more || query !== "").then(function (data) {
+            // Drop responses for a closed modal or a filter that has since changed
+            if (groupingSourceEntry !== source || groupingQuery !== query) return;
+            groupingSuggestions = more ? groupingSuggestions.concat(data.suggestions) : data.suggestions;
+            groupingCursor = data.next_cursor;
+            renderGroupingSuggestions();
         });
     }
 
@@ -1786,30 +1961,21 @@
         groupingSourceEntry = null;
         groupingSuggestions = [];
         groupingSelectedId = null;
+        groupingCursor = null;
+        clearTimeout(groupingTimer);
     }
 
-    function renderGroupingSuggestions(filter) {
+    function renderGroupingSuggestions() {
         var container = document.getElementById("grouping-suggestions");
         container.innerHTML = "";
-        var lower = filter.toLowerCase();
-
-        var filtered = groupingSuggestions.filter(function (e) {
-            if (!lower) return true;
-            if ((e.description || "").toLowerCase().indexOf(lower) >= 0) return true;
-            if ((e.date || "").indexOf(lower) >= 0) return true;
-            var adoItems = e.ado_items || [];
-            for (var ai = 0; ai < adoItems.length; ai++) {
-                if ((adoItems[ai].value || "").toLowerCase().indexOf(lower) >= 0) return true;
-            }
-            return false;
-        });
+        var filtered = groupingSuggestions;
 
         if (filtered.length === 0) {
             container.innerHTML = '<div style="padding:10px;color:var(--muted)">No matches</div>';
             return;
         }
 
-        for (var i = 0; i < Math.min(filtered.length, 50); i++) {
+        for (var i = 0; i < filtered.length; i++) {
             var e = filtered[i];
             var item = document.createElement("div");
             item.className = "suggestion-item";
@@ -1844,13 +2010,21 @@
             (function (entry) {
                 item.onclick = function () {
                     groupingSelectedId = entry.id;
-                    renderGroupingSuggestions(document.getElementById("grouping-filter").value);
+                    renderGroupingSuggestions();
                     showConflictResolution(entry);
                 };
             })(e);
 
             container.appendChild(item);
         }
+
+        if (groupingCursor) {
+            var more = document.createElement("div");
+            more.className = "suggestion-item suggestion-more";
+            more.textContent = "Show more\u2026";
+            more.onclick = function () { fetchGroupingSuggestions(true); };
+            container.appendChild(more);
+        }
     }
 
     var SHARED_FIELD_LABELS = {
@@ -1940,9 +2114,9 @@
         api("POST", "/api/entries/" + groupingSourceEntry.id + "/link", {
             target_entry_id: groupingSelectedId,
             resolution: resolution
-        }).then(function () {
+        }).then(function (result) {
             closeGroupingModal();
-            loadEntries();
+            applyDelta(result);
         });
     }
 
@@ -1970,25 +2144,18 @@
     function renderImputationReport() {
         var range = reportMonthRange();
         document.getElementById("imp-month-label").textContent = reportMonthLabel();
-        api("GET", "/api/entries?from=" + range.from + "&to=" + range.to).then(function (data) {
-            // Aggregate: { date -> { account_id -> { duration, number, label } } }
+        var url = "/api/reports/imputations?group_by=day&from=" + range.from + "&to=" + range.to;
+        api("GET", url).then(function (report) {
+            // Per-day, per-account sums come aggregated: { date -> { account_id -> { duration, number, label } } }
             var dayMap = {};
-            for (var i = 0; i < data.length; i++) {
-                var e = data[i];
-                var splits = e.splits || [];
-                for (var j = 0; j < splits.length; j++) {
-                    var s = splits[j];
-                    if (!dayMap[e.date]) dayMap[e.date] = {};
-                    var key = s.account_id;
-                    if (!dayMap[e.date][key]) {
-                        dayMap[e.date][key] = {
-                            duration: 0,
-                            number: s.account_number || "?",
-                            label: acctLabel(s)
-                        };
-                    }
-                    dayMap[e.date][key].duration += s.duration;
-                }
+            for (var i = 0; i < report.rows.length; i++) {
+                var s = report.rows[i];
+                if (!dayMap[s.period]) dayMap[s.period] = {};
+                dayMap[s.period][s.account_id] = {
+                    duration: s.duration,
+                    number: s.account_number,
+                    label: acctLabel(s)
+                };
             }
 
             // Sort dates ascending
@@ -2110,6 +2277,11 @@
         });
     }
 
+    function exportReportMonth() {
+        var range = reportMonthRange();
+        window.location.href = "/api/export?format=csv&from=" + range.from + "&to=" + range.to;
+    }
+
     function impPrevMonth() {
         reportMonth.month--;
         if (reportMonth.month < 0) { reportMonth.month = 11; reportMonth.year--; }
@@ -2290,6 +2462,7 @@
     }
 
     // --- Event listeners ---
+    window.addEventListener("scroll", fillViewport);
     document.getElementById("btn-undo").onclick = doUndo;
     document.getElementById("btn-redo").onclick = doRedo;
     document.getElementById("btn-today").onclick = scrollToToday;
@@ -2299,20 +2472,27 @@
     document.getElementById("btn-add-link-type").onclick = addLinkType;
     document.getElementById("btn-imp-prev").onclick = impPrevMonth;
     document.getElementById("btn-imp-next").onclick = impNextMonth;
+    document.getElementById("btn-imp-export").onclick = exportReportMonth;
     document.getElementById("imp-month-label").onclick = openMonthPicker;
     document.getElementById("view-select").onchange = function () { switchView(this.value); };
     document.getElementById("btn-close-grouping").onclick = closeGroupingModal;
     document.getElementById("btn-cancel-link").onclick = closeGroupingModal;
     document.getElementById("btn-apply-link").onclick = applyGroupingLink;
     document.getElementById("grouping-filter").oninput = function () {
-        renderGroupingSuggestions(this.value);
+        var value = this.value.trim();
+        clearTimeout(groupingTimer);
+        groupingTimer = setTimeout(function () {
+            if (!groupingSourceEntry || value === groupingQuery) return;
+            groupingQuery = value;
+            groupingCursor = null;
+            fetchGroupingSuggestions(false);
+        }, 200);
     };
     document.getElementById("filter-entries").oninput = function () {
-        filterTerm = this.value;
-        renderDays();
+        setFilter(this.value);
     };
     document.getElementById("filter-entries").onkeydown = function (ev) {
-        if (ev.key === "Escape") { this.value = ""; filterTerm = ""; renderDays(); this.blur(); }
+        if (ev.key === "Escape") { this.value = ""; setFilter(""); this.blur(); }
     };
     document.getElementById("find-input").oninput = function () { updateFind(); };
     document.getElementById("find-input").onkeydown = function (ev) {
@@ -2354,7 +2534,9 @@
         duplicate_entry: "duplicate",
         duplicate_link_entry: "duplicate & link",
         ungroup_entry: "ungroup",
-        link_entries: "link"
+        link_entries: "link",
+        reorder_entry: "reorder",
+        batch: "move"
     };
 
     function showToast(msg) {
@@ -2373,18 +2555,20 @@
         }, 2000);
     }
 
+    function setUndoButtons(status) {
+        document.getElementById("btn-undo").disabled = !status.can_undo;
+        document.getElementById("btn-redo").disabled = !status.can_redo;
+    }
+
     function updateUndoButtons() {
-        api("GET", "/api/undo-status").then(function (status) {
-            document.getElementById("btn-undo").disabled = !status.can_undo;
-            document.getElementById("btn-redo").disabled = !status.can_redo;
-        });
+        api("GET", "/api/undo-status").then(setUndoButtons);
     }
 
     function doUndo() {
         api("POST", "/api/undo").then(function (result) {
             if (result.ok) {
                 showToast("Undo: " + (FRIENDLY_ACTIONS[result.action_type] || result.action_type));
-                loadEntries();
+                applyDelta(result);
             }
         });
     }
@@ -2393,7 +2577,7 @@
         api("POST", "/api/redo").then(function (result) {
             if (result.ok) {
                 showToast("Redo: " + (FRIENDLY_ACTIONS[result.action_type] || result.action_type));
-                loadEntries();
+                applyDelta(result);
             }
         });
     }
@@ -0,0 +1,69 @@
+"""Quokka - Tests for db.py.
+
+    python -m unittest test_db
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import db
+
+
+class ImportEntriesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="quokka-test-")
+        self.db_path = os.path.join(self.tmp_dir, "test.db")
+        db.init_db(self.db_path)
+
+    def tearDown(self):
+        db.close_all()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_basic_format_date_is_stored_canonical(self):
+        result = db.import_entries(self.db_path, [
+            {"date": "20240301", "entry_id": "1", "duration": "30"},
+            {"date": "2024-W09-5", "entry_id": "2", "duration": "30"},
+        ])
+        self.assertTrue(result["ok"], result)
+        dates = [e["date"] for e in db.list_entries(self.db_path)]
+        self.assertEqual(dates, ["2024-03-01", "2024-03-01"])
+
+    def test_invalid_date_is_a_row_error(self):
+        result = db.import_entries(self.db_path, [
+            {"date": "2024-03-01", "entry_id": "1", "duration": "30"},
+            {"date": "01/03/2024", "entry_id": "2", "duration": "30"},
+        ])
+        self.assertFalse(result["ok"])
+        self.assertEqual((result["reason"], result["line"]), ("invalid_row", 2))
+        self.assertEqual(db.list_entries(self.db_path), [])
+
+
+class DeleteLinkTypeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="quokka-test-")
+        self.db_path = os.path.join(self.tmp_dir, "test.db")
+        db.init_db(self.db_path)
+
+    def tearDown(self):
+        db.close_all()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_cascaded_items_show_in_change_feed(self):
+        link_type = db.create_link_type(self.db_path, "Work item")
+        db.create_entry(self.db_path, {
+            "date": "2024-03-01", "duration": 30,
+            "ado_items": [{"link_type_id": link_type["id"], "value": "42"}],
+        })
+        since = db.change_version(self.db_path)
+        db.delete_link_type(self.db_path, link_type["id"])
+        changes = db.list_changes(self.db_path, since)
+        self.assertEqual(len(changes["entries"]), 1)
+        self.assertEqual(changes["entries"][0]["ado_items"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()